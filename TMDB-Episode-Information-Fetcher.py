@@ -2,15 +2,78 @@ from PyQt6 import QtWidgets
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QLineEdit, QComboBox, QMessageBox, QFileDialog, 
-    QInputDialog, QTextEdit, QFrame
+    QInputDialog, QFrame, QListView, QAbstractItemView, QTabWidget
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import (
+    Qt, QThread, QAbstractListModel, QModelIndex, QEvent, QEventLoop, QTimer, pyqtSignal,
+    qInstallMessageHandler
+)
+from PyQt6.QtGui import QIcon, QBrush, QColor, QFont, QImage, QPalette, QPixmap
 import sys
 import os
+import io
+import re
+import codecs
+import json
+import mmap
+import array
+import struct
+import hashlib
+import time
+import asyncio
 import logging
+import argparse
+import sqlite3
+import threading
+import multiprocessing
+import tracemalloc
+import gc
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
 import traceback
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import ijson  # 可选：流式 JSON 解析，只取需要的字段
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # 可选：更快的 JSON 解码后端
+except ImportError:
+    orjson = None
+
+try:
+    import qasync  # 可选：让 Qt 事件循环驱动 asyncio
+except ImportError:
+    qasync = None
+
+try:
+    import aiohttp  # 可选：异步 HTTP 客户端
+except ImportError:
+    aiohttp = None
+
+try:
+    import psutil  # 可选：跨平台的进程资源统计，没有时读取 /proc
+except ImportError:
+    psutil = None
+
+# 每集只保留这些字段，演职员、客串演员、简介等直接跳过
+EPISODE_FIELDS = ('episode_number', 'name')
+# 详情面板需要的单集字段
+EPISODE_DETAIL_FIELDS = ('name', 'overview', 'air_date', 'runtime', 'vote_average', 'still_path')
+
+# 可通过环境变量指向本地的模拟服务
+TMDB_API_BASE = os.environ.get('TMDB_API_BASE', "https://api.themoviedb.org/3")
+TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p"
+THUMBNAIL_SIZE = 'w300'
+DETAIL_IMAGE_WIDTH = 300
+DETAIL_REQUEST_TIMEOUT = 10  # 单集详情和剧照请求的超时（秒），详情线程最多为此等待这么久才能退出
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024  # 内存中已解码剧照的上限
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024  # 磁盘缩略图缓存的上限
 
 def resource_path(relative_path):
     """ 获取资源的绝对路径 """
@@ -51,8 +114,8 @@ def exception_handler(func):
                 )
     return wrapper
 
-def get_api_key_path():
-    """ 获取 API key 文件的路径 """
+def get_app_path(name):
+    """ 获取程序目录下文件的路径 """
     try:
         # 获取程序所在目录
         if getattr(sys, 'frozen', False):
@@ -62,23 +125,1385 @@ def get_api_key_path():
             # 如果是 Python 脚本
             base_path = os.path.dirname(os.path.abspath(__file__))
         
-        return os.path.join(base_path, 'api_key.txt')
+        return os.path.join(base_path, name)
     except Exception as e:
-        logging.error(f"Error getting API key path: {str(e)}")
+        logging.error(f"Error getting path for {name}: {str(e)}")
         # 如果出错，返回当前目录
-        return 'api_key.txt'
+        return name
+
+def get_api_key_path():
+    """ 获取 API key 文件的路径 """
+    return get_app_path('api_key.txt')
+
+def project_episodes(data, fields=EPISODE_FIELDS):
+    """ 从已解码的季详情中只保留需要的剧集字段 """
+    return [
+        {field: episode.get(field) for field in fields}
+        for episode in data.get('episodes', [])
+    ]
+
+def decode_episodes_streaming(stream, fields=EPISODE_FIELDS):
+    """ 用 ijson 流式解析季详情，内存占用与响应大小无关 """
+    episodes = []
+    current = None
+    item_prefix = 'episodes.item'
+    field_prefix = item_prefix + '.'
+    for prefix, event, value in ijson.parse(stream):
+        if prefix == item_prefix:
+            if event == 'start_map':
+                current = dict.fromkeys(fields)
+            elif event == 'end_map':
+                episodes.append(current)
+                current = None
+        elif current is not None and prefix.startswith(field_prefix):
+            # 嵌套字段（如 crew.item.name）的前缀不会出现在 current 中
+            field = prefix[len(field_prefix):]
+            if field in current and event in ('string', 'number', 'boolean', 'null'):
+                current[field] = value
+    return episodes
+
+class JSONStreamReader:
+    """ 按需从字节流读取文本，用 JSONDecoder.raw_decode 逐个解码 JSON 值，只依赖标准库 """
+
+    CHUNK_SIZE = 64 * 1024
+    WHITESPACE = re.compile(r'[ \t\n\r]*')
+    NUMBER_CHARS = re.compile(r'[0-9+\-.eE]*')
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        """ 丢弃已解析的文本并追加新数据；读取量随未解析部分增大，避免单个大值被反复重新解析 """
+        if self.eof:
+            return False
+        data = self.stream.read(max(self.CHUNK_SIZE, len(self.buffer) - self.pos))
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(data, final=self.eof)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ 跳过空白并返回下一个字符，流结束时返回空字符串 """
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' in season response")
+        self.pos += 1
+
+    def value(self):
+        """ 解码下一个完整的 JSON 值 """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+            # 缓冲区末尾的数字可能被截断（例如 "1.5e" 只解析出 1.5），需要读到后续数据才能确定
+            if (isinstance(value, (int, float))
+                    and self.NUMBER_CHARS.match(self.buffer, end).end() == len(self.buffer)
+                    and self.read_more()):
+                continue
+            self.pos = end
+            return value
+
+def decode_episodes_incremental(stream, fields=EPISODE_FIELDS):
+    """ 标准库流式解析：episodes 数组中的元素逐个解码并立即投影，内存占用只与单集大小有关 """
+    reader = JSONStreamReader(stream)
+    episodes = []
+    reader.expect('{')
+    if reader.peek() == '}':
+        return episodes
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'episodes' and reader.peek() == '[':
+            reader.expect('[')
+            while reader.peek() != ']':
+                episode = reader.value()
+                episodes.append({field: episode.get(field) for field in fields})
+                if reader.peek() == ',':
+                    reader.expect(',')
+            reader.expect(']')
+        else:
+            reader.value()
+        if reader.peek() != ',':
+            break
+        reader.expect(',')
+    reader.expect('}')
+    return episodes
+
+def decode_episodes_orjson(stream, fields=EPISODE_FIELDS):
+    """ 用 orjson 一次性解码后立即丢弃多余字段，CPU 开销最低 """
+    return project_episodes(orjson.loads(stream.read()), fields)
+
+def decode_episodes_json(stream, fields=EPISODE_FIELDS):
+    """ 标准库一次性解码，小响应时最快 """
+    return project_episodes(json.loads(stream.read()), fields)
+
+# 可用的解码后端：一次性解码的内存峰值随响应大小增长；流式解码的内存占用保持平稳，
+# 其中标准库实现的 CPU 开销与一次性解码相当，ijson 逐个事件回调到 Python，开销明显更高
+SEASON_DECODERS = {}
+if orjson is not None:
+    SEASON_DECODERS['orjson'] = decode_episodes_orjson
+if ijson is not None:
+    SEASON_DECODERS['ijson'] = decode_episodes_streaming
+SEASON_DECODERS['stream'] = decode_episodes_incremental
+SEASON_DECODERS['json'] = decode_episodes_json
+
+# 响应达到该大小或大小未知时使用流式解码
+STREAMING_DECODE_MIN_BYTES = 256 * 1024
+
+def get_season_decoder(size=None):
+    """ 选择季详情解码后端：可用 TMDB_JSON_DECODER 环境变量指定；
+    否则小响应用最快的一次性解码，大响应或大小未知时用流式解码 """
+    name = os.environ.get('TMDB_JSON_DECODER')
+    if name:
+        if name in SEASON_DECODERS:
+            return SEASON_DECODERS[name]
+        logging.warning(f"JSON decoder '{name}' is not available, using default")
+    if size is not None and size < STREAMING_DECODE_MIN_BYTES:
+        return SEASON_DECODERS.get('orjson', decode_episodes_json)
+    return decode_episodes_incremental
+
+def decode_season_episodes(stream, fields=EPISODE_FIELDS, size=None):
+    """ 从季详情响应流中只提取需要的剧集字段，size 为响应体的字节数（未知时为 None） """
+    return get_season_decoder(size)(stream, fields)
+
+def read_credentials():
+    """ 读取 API key 文件中的全部凭据：每行一个 API 密钥或 Bearer 令牌，忽略空行和 # 注释 """
+    api_key_file = get_api_key_path()
+    logging.info(f"Checking for API key file: {api_key_file}")
+    if os.path.exists(api_key_file):
+        try:
+            with open(api_key_file, 'r', encoding='utf-8') as f:
+                credentials = [
+                    line.strip() for line in f
+                    if line.strip() and not line.strip().startswith('#')
+                ]
+            logging.info(f"Loaded {len(credentials)} API credentials")
+            return credentials
+        except Exception as e:
+            logging.error(f"Error reading API key file: {str(e)}")
+            return []
+    logging.info("API key file not found")
+    return []
+
+def read_api_key():
+    """ 返回 API key 文件中的第一个凭据，文件不存在或读取失败时返回 None """
+    credentials = read_credentials()
+    return credentials[0] if credentials else None
+
+def credential_auth(credential):
+    """ 返回凭据对应的 (查询参数, 请求头)
+
+    以 'Bearer ' 开头或 JWT 形式的 v4 读取令牌放在 Authorization 头中，其余作为 v3 的 api_key 参数。
+    """
+    credential = credential.strip()
+    if credential[:7].lower() == 'bearer ':
+        credential = credential[7:].strip()
+    elif credential.count('.') != 2:
+        return {'api_key': credential}, {}
+    return {}, {'Authorization': f'Bearer {credential}'}
+
+def format_season(season):
+    """ 将结构化的季数据格式化为界面与导出使用的文本 """
+    episode_names = [episode['name'] for episode in season['episodes']]
+    return f"第{season['season_number']}季——{season['name']}：\n" + "\n".join(episode_names)
+
+class RateLimiter:
+    """ 全局请求速率限制，通过共享内存在线程和进程之间协调 """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        # 下一个可用的请求时间点，所有进程共用同一个值
+        self.next_slot = multiprocessing.Value('d', 0.0)
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.next_slot.get_lock():
+            now = time.monotonic()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class CredentialsExhausted(requests.RequestException):
+    """ 凭据池中的所有凭据都已被 TMDB 拒绝 """
+
+def describe_error(e):
+    """ 不含请求地址的错误描述，可以写入任务队列或返回给客户端
+
+    requests 的异常信息带有完整的请求地址，其中包含 api_key，只能写入日志。
+    """
+    response = getattr(e, 'response', None)
+    if response is not None:
+        return f"HTTP {response.status_code}"
+    if isinstance(e, CredentialsExhausted):
+        return str(e)
+    if isinstance(e, requests.RequestException):
+        return type(e).__name__
+    return f"{type(e).__name__}: {e}"
+
+class CredentialPool:
+    """ 多个 API 密钥或 Bearer 令牌的轮换池
+
+    每个凭据有独立的速率限制和进行中请求计数，每次请求选用负载最小的可用凭据。
+    返回 401 的凭据永久移出轮换，返回 429 的凭据按 Retry-After 暂停使用。
+    所有状态都在共享内存中，可以在线程和进程之间共用。
+    """
+
+    REJECTED_STATUS = (401, 429)
+    DEFAULT_COOLDOWN = 10.0
+
+    def __init__(self, credentials, rate=0):
+        self.credentials = list(credentials)
+        if not self.credentials or not all(self.credentials):
+            raise ValueError("A credential pool needs at least one non-empty credential")
+        self.auth = [credential_auth(credential) for credential in self.credentials]
+        self.limiters = [RateLimiter(rate) for _ in self.credentials]
+        self.lock = multiprocessing.Lock()
+        self.in_flight = multiprocessing.Array('i', len(self.credentials), lock=False)
+        # 凭据可再次使用的时间点（time.monotonic），inf 表示已移出轮换
+        self.available_at = multiprocessing.Array('d', len(self.credentials), lock=False)
+        # 每个凭据最近一次被选用的序号；不限速时 next_slot 都为 0，靠它在空闲凭据之间轮流
+        self.last_used = multiprocessing.Array('q', len(self.credentials), lock=False)
+        self.uses = multiprocessing.Value('q', 0, lock=False)
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def try_acquire(self):
+        """ 占用负载最小的可用凭据，返回 (编号, None)；全部在冷却中时返回 (None, 需要等待的秒数) """
+        with self.lock:
+            now = time.monotonic()
+            available = [i for i in range(len(self.credentials)) if self.available_at[i] <= now]
+            if not available:
+                wait = min(self.available_at, default=float('inf')) - now
+                if wait == float('inf'):
+                    raise CredentialsExhausted("All TMDB credentials were rejected")
+                return None, wait
+            # 进行中的请求（包括正在等待速率限制的）最少者优先，其次是最早可发出请求者，再其次是最久未用者
+            index = min(available, key=lambda i: (
+                self.in_flight[i], self.limiters[i].next_slot.value, self.last_used[i]
+            ))
+            self.in_flight[index] += 1
+            self.uses.value += 1
+            self.last_used[index] = self.uses.value
+        return index, None
+
+    def acquire(self):
+        """ 阻塞直到有可用凭据，并按该凭据的速率限制等待，返回凭据编号 """
+        while True:
+            index, wait = self.try_acquire()
+            if index is not None:
+                self.limiters[index].acquire()
+                return index
+            logging.info(f"All credentials are cooling down, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def release(self, index, status=None, retry_after=None):
+        """ 归还凭据；status 为 401 时移出轮换，为 429 时按 Retry-After 冷却 """
+        cooldown = None
+        with self.lock:
+            self.in_flight[index] -= 1
+            if status == 401:
+                self.available_at[index] = float('inf')
+            elif status == 429:
+                try:
+                    cooldown = float(retry_after)
+                except (TypeError, ValueError):
+                    cooldown = self.DEFAULT_COOLDOWN
+                self.available_at[index] = max(self.available_at[index], time.monotonic() + cooldown)
+        if status == 401:
+            logging.warning(f"Credential #{index + 1} was rejected (401), removed from rotation")
+        elif status == 429:
+            logging.warning(f"Credential #{index + 1} was rate limited (429), cooling down for {cooldown:g}s")
+
+    def status(self):
+        """ 每个凭据的状态，不包含凭据本身 """
+        with self.lock:
+            now = time.monotonic()
+            return [
+                {
+                    'credential': f"#{i + 1}",
+                    'in_flight': self.in_flight[i],
+                    'state': 'revoked' if self.available_at[i] == float('inf')
+                    else 'cooling' if self.available_at[i] > now else 'active'
+                }
+                for i in range(len(self.credentials))
+            ]
+
+def create_session(pool_size=10):
+    """ 创建带连接池的 session，pool_size 应不小于共用它的线程数 """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+class EpisodeFetcher:
+    """ 与界面无关的 TMDB 剧集获取逻辑，供界面线程和批处理共用 """
+
+    def __init__(self, api_key, session=None, rate_limiter=None):
+        """ api_key 可以是单个 API 密钥或令牌，也可以是多个线程、进程共用的 CredentialPool """
+        self.credentials = api_key if isinstance(api_key, CredentialPool) else CredentialPool([api_key])
+        self.base_url = TMDB_API_BASE
+        self.session = session if session is not None else requests.Session()
+        self.rate_limiter = rate_limiter
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url, params, stream=False, timeout=None):
+        """ 用负载最小的凭据发送请求；凭据返回 401/429 时换下一个可用凭据重试 """
+        attempts = len(self.credentials) + 1
+        for attempt in range(attempts):
+            index = self.credentials.acquire()
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            auth_params, headers = self.credentials.auth[index]
+            try:
+                response = self.session.get(
+                    url, params=dict(params, **auth_params), headers=headers, stream=stream, timeout=timeout
+                )
+            except Exception:
+                self.credentials.release(index)
+                raise
+            self.credentials.release(index, response.status_code, response.headers.get('Retry-After'))
+            if response.status_code not in CredentialPool.REJECTED_STATUS or attempt == attempts - 1:
+                return response
+            response.close()
+
+    def get_show_episodes(self, show_name, language, checkpoint=None):
+        """ 搜索剧集并获取全部季，未找到时返回 None
+
+        checkpoint 用于断点续跑：已保存的剧集 ID 和季不会重复请求。
+        网络错误以 requests.RequestException 抛出，由调用方决定如何处理。
+        """
+        show = checkpoint.load_show() if checkpoint is not None else None
+        if show is None:
+            show = self.search_show(show_name, language)
+            if show is None:
+                return None
+            if checkpoint is not None:
+                checkpoint.save_show(show)
+        else:
+            logging.info(f"Resuming show: {show['name']} (ID: {show['id']})")
+
+        return {
+            'show_id': show['id'],
+            'show_name': show['name'],
+            'language': language,
+            'seasons': self.fetch_season_episodes(show['id'], language, checkpoint)
+        }
+
+    def search_show(self, show_name, language):
+        search_url = f"{self.base_url}/search/tv"
+        params = {
+            'query': show_name,
+            'language': language
+        }
+
+        logging.info(f"Searching for show: {show_name} in language: {language}")
+        response = self.get(search_url, params)
+        response.raise_for_status()
+        data = response.json()
+
+        if 'results' in data and data['results']:
+            show = {'id': data['results'][0]['id'], 'name': data['results'][0]['name']}
+            logging.info(f"Found show: {show['name']} (ID: {show['id']})")
+            return show
+
+        logging.warning(f"No results found for: {show_name}")
+        return None
+
+    def fetch_season_episodes(self, show_id, language, checkpoint=None):
+        seasons_url = f"{self.base_url}/tv/{show_id}"
+        params = {
+            'language': language
+        }
+
+        logging.info(f"Fetching seasons for show ID: {show_id}")
+        seasons_response = self.get(seasons_url, params)
+        seasons_response.raise_for_status()
+        seasons_data = seasons_response.json()
+
+        if 'seasons' not in seasons_data:
+            logging.warning(f"No seasons found for show ID: {show_id}")
+            return []
+
+        all_seasons = []
+        total_seasons = len(seasons_data['seasons'])
+        logging.info(f"Found {total_seasons} seasons")
+
+        for i, season in enumerate(seasons_data['seasons'], 1):
+            season_number = season['season_number']
+            saved = checkpoint.load_season(season_number) if checkpoint is not None else None
+            if saved is not None:
+                logging.info(f"Season {season_number} restored from checkpoint ({i}/{total_seasons})")
+                all_seasons.append(saved)
+                continue
+
+            logging.info(f"Fetching episodes for season {season_number} ({i}/{total_seasons})")
+
+            # 流式读取响应体，只解码剧集名称等少量字段
+            episodes_url = f"{self.base_url}/tv/{show_id}/season/{season_number}"
+            episodes_response = self.get(episodes_url, params, stream=True)
+            try:
+                episodes_response.raise_for_status()
+                episodes_response.raw.decode_content = True
+                # 压缩响应的 Content-Length 不代表解压后的大小，按未知处理
+                size = episodes_response.headers.get('Content-Length')
+                if size is not None and not episodes_response.headers.get('Content-Encoding'):
+                    size = int(size)
+                else:
+                    size = None
+                episodes = decode_season_episodes(episodes_response.raw, size=size)
+            finally:
+                episodes_response.close()
+
+            logging.info(f"Found {len(episodes)} episodes in season {season_number}")
+
+            season_data = {
+                'season_number': season_number,
+                'name': season['name'],
+                'episodes': episodes
+            }
+            if checkpoint is not None:
+                checkpoint.save_season(season_data)
+            all_seasons.append(season_data)
+
+        return all_seasons
+
+    def fetch_episode_details(self, show_id, season_number, episode_number, language):
+        """ 获取单集详情，只保留详情面板需要的字段 """
+        url = f"{self.base_url}/tv/{show_id}/season/{season_number}/episode/{episode_number}"
+        params = {
+            'language': language
+        }
+        logging.info(f"Fetching details for show {show_id} S{season_number}E{episode_number}")
+        response = self.get(url, params, timeout=DETAIL_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        return {field: data.get(field) for field in EPISODE_DETAIL_FIELDS}
+
+    def fetch_image(self, image_path, size=THUMBNAIL_SIZE):
+        """ 下载 TMDB 图片，返回原始字节 """
+        response = self.session.get(f"{TMDB_IMAGE_BASE}/{size}{image_path}", timeout=DETAIL_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+
+class AsyncEpisodeFetcher:
+    """ EpisodeFetcher 的 asyncio 版本：所有请求在同一个线程中并发执行 """
+
+    def __init__(self, api_key, max_connections=100):
+        self.credentials = api_key if isinstance(api_key, CredentialPool) else CredentialPool([api_key])
+        self.base_url = TMDB_API_BASE
+        self.max_connections = max_connections
+        self.session = None
+
+    async def acquire_credential(self):
+        """ 与 CredentialPool.acquire 相同，但冷却期间让出事件循环，也不按单个凭据限速 """
+        while True:
+            index, wait = self.credentials.try_acquire()
+            if index is not None:
+                return index
+            await asyncio.sleep(wait)
+
+    async def get_bytes(self, url, params):
+        if self.session is None:
+            # 会话必须在事件循环运行后创建
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        attempts = len(self.credentials) + 1
+        for attempt in range(attempts):
+            index = await self.acquire_credential()
+            auth_params, headers = self.credentials.auth[index]
+            status = retry_after = None
+            try:
+                async with self.session.get(url, params=dict(params, **auth_params), headers=headers) as response:
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    if status not in CredentialPool.REJECTED_STATUS or attempt == attempts - 1:
+                        response.raise_for_status()
+                        return await response.read()
+            finally:
+                self.credentials.release(index, status, retry_after)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_show_episodes(self, show_name, language):
+        """ 与 EpisodeFetcher.get_show_episodes 返回相同结构，各季并发获取 """
+        params = {
+            'language': language
+        }
+        logging.info(f"Searching for show: {show_name} in language: {language}")
+        data = json.loads(await self.get_bytes(f"{self.base_url}/search/tv", dict(params, query=show_name)))
+        if not data.get('results'):
+            logging.warning(f"No results found for: {show_name}")
+            return None
+
+        show_id = data['results'][0]['id']
+        show_name = data['results'][0]['name']
+        logging.info(f"Found show: {show_name} (ID: {show_id})")
+        seasons_data = json.loads(await self.get_bytes(f"{self.base_url}/tv/{show_id}", params))
+        seasons = await asyncio.gather(*(
+            self.fetch_season(show_id, season, params)
+            for season in seasons_data.get('seasons', [])
+        ))
+        return {
+            'show_id': show_id,
+            'show_name': show_name,
+            'language': language,
+            'seasons': list(seasons)
+        }
+
+    async def fetch_season(self, show_id, season, params):
+        season_number = season['season_number']
+        body = await self.get_bytes(f"{self.base_url}/tv/{show_id}/season/{season_number}", params)
+        if len(body) < STREAMING_DECODE_MIN_BYTES:
+            episodes = decode_season_episodes(io.BytesIO(body), size=len(body))
+        else:
+            # 大响应在线程池中解码，事件循环（也就是界面线程）不必等待整段解码完成。
+            # 解码仍需持有 GIL，只是与界面交替执行，总耗时不会缩短
+            episodes = await asyncio.get_running_loop().run_in_executor(
+                None, decode_season_episodes, io.BytesIO(body), EPISODE_FIELDS, len(body))
+        logging.info(f"Found {len(episodes)} episodes in season {season_number}")
+        return {
+            'season_number': season_number,
+            'name': season['name'],
+            'episodes': episodes
+        }
+
+def async_ui_available():
+    """ 异步界面模式需要 qasync 和 aiohttp """
+    return qasync is not None and aiohttp is not None
+
+class JobCheckpoint:
+    """ 单个任务的断点：保存已找到的剧集 ID 和已完成的季 """
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+
+    def load_show(self):
+        return self.queue.load_show(self.job_id)
+
+    def save_show(self, show):
+        self.queue.save_show(self.job_id, show)
+
+    def load_season(self, season_number):
+        return self.queue.load_season(self.job_id, season_number)
+
+    def save_season(self, season):
+        self.queue.save_season(self.job_id, season)
+
+class JobQueue:
+    """ 基于 SQLite 的持久化 (剧集, 语言) 任务队列，进程中断后可从断点继续 """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path, max_attempts=3, retry_delay=5.0, max_retry_delay=300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        # 失败后的重试间隔按尝试次数指数增长，避免短暂故障在几毫秒内耗尽全部重试次数
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                show_name TEXT NOT NULL,
+                language TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                show_id INTEGER,
+                tmdb_name TEXT,
+                result TEXT,
+                error TEXT,
+                updated_at REAL,
+                not_before REAL,
+                UNIQUE (show_name, language)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, attempts, id);
+            CREATE TABLE IF NOT EXISTS season_checkpoints (
+                job_id INTEGER NOT NULL,
+                season_number INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, season_number)
+            );
+        """)
+        # 旧版本创建的队列没有重试时间列
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if 'not_before' not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+
+    def close(self):
+        self.conn.close()
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def add_jobs(self, show_names, language):
+        """ 添加任务，已存在的 (剧集, 语言) 会被忽略，返回新增数量 """
+        rows = [(name, language, time.time()) for name in show_names]
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (show_name, language, updated_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self.conn.execute("COMMIT")
+            return self.conn.total_changes - before
+
+    def recover(self):
+        """ 将上次中断时仍在运行的任务放回队列，返回数量 """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (self.PENDING, time.time(), self.RUNNING)
+            )
+            return cursor.rowcount
+
+    def release(self):
+        """ 将运行中的任务放回队列且不计入尝试次数，用于主动中止批处理，返回数量 """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), updated_at = ? WHERE status = ?",
+                (self.PENDING, time.time(), self.RUNNING)
+            )
+            return cursor.rowcount
+
+    def retry_failed(self):
+        """ 将已放弃的任务重新排队并重置尝试次数，返回数量 """
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, not_before = NULL, updated_at = ? WHERE status = ?",
+                (self.PENDING, time.time(), self.FAILED)
+            )
+            return cursor.rowcount
+
+    def claim(self):
+        """ 领取一个已到重试时间的待处理任务，没有可领取的任务时返回 None """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT id, show_name, language, attempts FROM jobs "
+                    "WHERE status = ? AND (not_before IS NULL OR not_before <= ?) "
+                    "ORDER BY attempts, id LIMIT 1",
+                    (self.PENDING, time.time())
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (self.RUNNING, time.time(), row['id'])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def complete(self, job_id, result):
+        """ 保存结果并清除该任务的季断点 """
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (self.DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+            self.conn.execute("DELETE FROM season_checkpoints WHERE job_id = ?", (job_id,))
+            self.conn.execute("COMMIT")
+
+    def fail(self, job_id, error):
+        """ 记录失败；未超过重试次数的任务在退避时间之后重新排队 """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "not_before = ? + MIN(? * (1 << (attempts - 1)), ?), "
+                "error = ?, updated_at = ? WHERE id = ?",
+                (self.max_attempts, self.FAILED, self.PENDING,
+                 now, self.retry_delay, self.max_retry_delay, error, now, job_id)
+            )
+
+    def retry_wait(self):
+        """ 距离下一个待重试任务可领取还有多少秒；没有待处理任务时返回 None """
+        rows = self.execute(
+            "SELECT MIN(COALESCE(not_before, 0)) AS not_before FROM jobs WHERE status = ?",
+            (self.PENDING,)
+        )
+        if rows[0]['not_before'] is None:
+            return None
+        return max(0.0, rows[0]['not_before'] - time.time())
+
+    def checkpoint(self, job_id):
+        return JobCheckpoint(self, job_id)
+
+    def load_show(self, job_id):
+        rows = self.execute("SELECT show_id, tmdb_name FROM jobs WHERE id = ?", (job_id,))
+        if not rows or rows[0]['show_id'] is None:
+            return None
+        return {'id': rows[0]['show_id'], 'name': rows[0]['tmdb_name']}
+
+    def save_show(self, job_id, show):
+        self.execute(
+            "UPDATE jobs SET show_id = ?, tmdb_name = ? WHERE id = ?",
+            (show['id'], show['name'], job_id)
+        )
+
+    def load_season(self, job_id, season_number):
+        rows = self.execute(
+            "SELECT data FROM season_checkpoints WHERE job_id = ? AND season_number = ?",
+            (job_id, season_number)
+        )
+        return json.loads(rows[0]['data']) if rows else None
+
+    def save_season(self, job_id, season):
+        self.execute(
+            "INSERT OR REPLACE INTO season_checkpoints (job_id, season_number, data) VALUES (?, ?, ?)",
+            (job_id, season['season_number'], json.dumps(season, ensure_ascii=False))
+        )
+
+    def counts(self):
+        rows = self.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row['status']: row['n'] for row in rows}
+
+    def results(self):
+        """ 按任务顺序返回已完成任务的 (剧集名称, 语言, 结果) """
+        rows = self.execute(
+            "SELECT show_name, language, result FROM jobs WHERE status = ? ORDER BY id",
+            (self.DONE,)
+        )
+        for row in rows:
+            yield row['show_name'], row['language'], json.loads(row['result'])
+
+def fetch_job(fetcher, queue, job):
+    """ 执行单个任务，返回 (任务 ID, 结果, 错误信息) """
+    logging.info(f"Job {job['id']}: {job['show_name']} ({job['language']}), attempt {job['attempts']}")
+    try:
+        result = fetcher.get_show_episodes(
+            job['show_name'], job['language'], queue.checkpoint(job['id'])
+        )
+        return job['id'], result, None
+    except CredentialsExhausted:
+        # 不是任务本身的错误，继续领取任务只会全部失败，交给 run_batch 中止整个批处理
+        raise
+    except Exception as e:
+        logging.error(f"Job {job['id']} failed: {str(e)}")
+        return job['id'], None, describe_error(e)
+
+def record_job(queue, job_id, result, error):
+    if error is None:
+        queue.complete(job_id, result)
+    else:
+        queue.fail(job_id, error)
+
+def process_jobs(queue, fetcher):
+    """ 批处理工作线程：不断领取任务直到队列为空，等待重试的任务到时后继续领取 """
+    while True:
+        job = queue.claim()
+        if job is None:
+            wait = queue.retry_wait()
+            if wait is None:
+                return
+            time.sleep(wait)
+            continue
+        record_job(queue, *fetch_job(fetcher, queue, job))
+
+# 分片批处理中每个工作进程自己的 fetcher 和断点数据库连接
+_batch_worker = None
+# 分片批处理每一轮为每个进程领取的任务数；领取即计入尝试次数，中断时只影响这一轮的任务
+SHARD_JOBS_PER_PROCESS = 4
+
+def init_batch_worker(credentials, db_path, rate_limiter):
+    """ 工作进程初始化：每个进程有独立的连接池，凭据池和速率限制与其他进程共享 """
+    global _batch_worker
+    setup_logging()
+    fetcher = EpisodeFetcher(credentials, create_session(pool_size=1), rate_limiter)
+    _batch_worker = (fetcher, JobQueue(db_path))
+
+def run_batch_job(job):
+    fetcher, queue = _batch_worker
+    return fetch_job(fetcher, queue, job)
+
+def run_sharded_jobs(queue, credentials, rate_limiter, processes):
+    """ 把任务分发到进程池，结果由主进程统一写回队列
+
+    每一轮最多领取 processes * SHARD_JOBS_PER_PROCESS 个任务；失败后重新排队的任务在之后的轮次中重试。
+    """
+    with multiprocessing.Pool(
+        processes, initializer=init_batch_worker,
+        initargs=(credentials, queue.path, rate_limiter)
+    ) as pool:
+        while True:
+            jobs = []
+            while len(jobs) < processes * SHARD_JOBS_PER_PROCESS:
+                job = queue.claim()
+                if job is None:
+                    break
+                jobs.append(job)
+            if not jobs:
+                wait = queue.retry_wait()
+                if wait is None:
+                    return
+                logging.info(f"Waiting {wait:.1f}s for jobs to retry")
+                time.sleep(wait)
+                continue
+            logging.info(f"Dispatching {len(jobs)} jobs to {processes} processes")
+            for job_id, result, error in pool.imap_unordered(run_batch_job, jobs):
+                record_job(queue, job_id, result, error)
+
+class CatalogSnapshot:
+    """ 只读的列式目录快照，通过 mmap 打开，查询时才解码需要的字符串
+
+    文件布局（小端）：文件头之后依次为字符串偏移、剧集表、季表、集表，最后是
+    UTF-8 字符串池。所有名称都去重后只存一次，季号和集号存为整数数组。
+    """
+
+    MAGIC = b'TMDBCAT1'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIIIII')  # 魔数, 版本, 字符串数, 剧集数, 季数, 集数
+    # (列名, 类型, 长度对应的计数)，按文件中的顺序排列
+    COLUMNS = (
+        ('string_offsets', 'I', 'strings+1'),
+        ('show_query', 'I', 'shows'),
+        ('show_name', 'I', 'shows'),
+        ('show_language', 'I', 'shows'),
+        ('show_id', 'I', 'shows'),
+        ('show_seasons', 'I', 'shows+1'),
+        ('season_number', 'i', 'seasons'),
+        ('season_name', 'I', 'seasons'),
+        ('season_episodes', 'I', 'seasons+1'),
+        ('episode_number', 'i', 'episodes'),
+        ('episode_name', 'I', 'episodes'),
+    )
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        self.columns = {}
+        if len(self.buffer) < self.HEADER.size:
+            self.close()
+            raise ValueError(f"Not a catalog snapshot: {path}")
+        magic, version, *counts = self.HEADER.unpack_from(self.buffer)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"Not a catalog snapshot: {path}")
+        self.counts = dict(zip(('strings', 'shows', 'seasons', 'episodes'), counts))
+
+        # 列和字符串池必须完整落在文件内，截断的文件在打开时就拒绝，而不是查询时越界
+        layout = list(self.column_layout(self.counts))
+        offset = self.HEADER.size
+        strings_offset = offset + sum(count * 4 for _, _, count in layout)
+        if strings_offset > len(self.buffer):
+            self.close()
+            raise ValueError(f"Truncated catalog snapshot: {path}")
+        # 字符串偏移是第一列，最后一个偏移就是字符串池的长度
+        strings_size, = struct.unpack_from('<I', self.buffer, offset + self.counts['strings'] * 4)
+        if strings_offset + strings_size > len(self.buffer):
+            self.close()
+            raise ValueError(f"Truncated catalog snapshot: {path}")
+        for name, typecode, count in layout:
+            size = count * 4
+            view = self.buffer[offset:offset + size]
+            if sys.byteorder == 'little':
+                self.columns[name] = view.cast(typecode)
+            else:
+                column = array.array(typecode, view)
+                column.byteswap()
+                self.columns[name] = column
+            offset += size
+        self.strings = self.buffer[offset:]
+        self.show_lookup = None
+
+    @classmethod
+    def column_layout(cls, counts):
+        for name, typecode, count in cls.COLUMNS:
+            key, _, extra = count.partition('+')
+            yield name, typecode, counts[key] + (1 if extra else 0)
+
+    def close(self):
+        # 先释放所有视图，否则 mmap 无法关闭
+        self.columns = {}
+        self.strings = None
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.counts['shows']
+
+    def string(self, index):
+        offsets = self.columns['string_offsets']
+        return str(self.strings[offsets[index]:offsets[index + 1]], 'utf-8')
+
+    def show(self, index):
+        """ 返回剧集的基本信息，不解码季和集 """
+        c = self.columns
+        return {
+            'query': self.string(c['show_query'][index]),
+            'show_id': c['show_id'][index],
+            'show_name': self.string(c['show_name'][index]),
+            'language': self.string(c['show_language'][index])
+        }
+
+    def shows(self):
+        for index in range(len(self)):
+            yield self.show(index)
+
+    def find(self, name, language=None):
+        """ 按查询名或 TMDB 名称查找剧集，返回下标，未找到时返回 None """
+        if self.show_lookup is None:
+            c = self.columns
+            lookup = {}
+            for index in range(len(self)):
+                language_code = self.string(c['show_language'][index])
+                for column in ('show_query', 'show_name'):
+                    key = (self.string(c[column][index]).casefold(), language_code)
+                    lookup.setdefault(key, index)
+                    lookup.setdefault((key[0], None), index)
+            self.show_lookup = lookup
+        return self.show_lookup.get((name.strip().casefold(), language))
+
+    def seasons(self, index):
+        """ 返回与 EpisodeFetcher 相同结构的季列表 """
+        c = self.columns
+        return [
+            {
+                'season_number': c['season_number'][season],
+                'name': self.string(c['season_name'][season]),
+                'episodes': [
+                    {'episode_number': number, 'name': name}
+                    for number, name in self.season_episodes(season)
+                ]
+            }
+            for season in range(c['show_seasons'][index], c['show_seasons'][index + 1])
+        ]
+
+    def season_episodes(self, season):
+        """ 返回一季中每集的 (集号, 名称) """
+        c = self.columns
+        episodes = []
+        for episode in range(c['season_episodes'][season], c['season_episodes'][season + 1]):
+            number = c['episode_number'][episode]
+            episodes.append((None if number < 0 else number, self.string(c['episode_name'][episode])))
+        return episodes
+
+    def show_keys(self):
+        """ 返回 {(剧集 ID, 语言): 下标}，用于在两次运行之间对应同一部剧集 """
+        c = self.columns
+        languages = {}
+        keys = {}
+        for index in range(len(self)):
+            language_index = c['show_language'][index]
+            if language_index not in languages:
+                languages[language_index] = self.string(language_index)
+            keys[(c['show_id'][index], languages[language_index])] = index
+        return keys
+
+    def season_digests(self, index):
+        """ 返回 {季号: (摘要, 季下标)}，摘要只覆盖集号和剧集名称
+
+        直接对字符串池中的 UTF-8 字节求哈希，不解码字符串。
+        """
+        c = self.columns
+        offsets = c['string_offsets']
+        pack_number = struct.Struct('<i').pack
+        digests = {}
+        for season in range(c['show_seasons'][index], c['show_seasons'][index + 1]):
+            digest = hashlib.blake2b(digest_size=16)
+            for episode in range(c['season_episodes'][season], c['season_episodes'][season + 1]):
+                name = c['episode_name'][episode]
+                digest.update(pack_number(c['episode_number'][episode]))
+                digest.update(self.strings[offsets[name]:offsets[name + 1]])
+                digest.update(b'\0')
+            digests[c['season_number'][season]] = (digest.digest(), season)
+        return digests
+
+    def show_result(self, index):
+        result = self.show(index)
+        del result['query']
+        result['seasons'] = self.seasons(index)
+        return result
+
+def write_catalog_snapshot(path, records):
+    """ 将 (查询名, 语言, 结果) 写成列式快照，返回写入的剧集数
+
+    结果为 None（未找到）的记录会被跳过。先写临时文件再替换，避免留下半个快照。
+    """
+    strings = {}
+
+    def intern(value):
+        value = value or ''
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    columns = {name: array.array(typecode) for name, typecode, _ in CatalogSnapshot.COLUMNS}
+    columns['show_seasons'].append(0)
+    columns['season_episodes'].append(0)
+    for query, language, result in records:
+        if result is None:
+            continue
+        columns['show_query'].append(intern(query))
+        columns['show_name'].append(intern(result['show_name']))
+        columns['show_language'].append(intern(language))
+        columns['show_id'].append(result['show_id'])
+        for season in result['seasons']:
+            columns['season_number'].append(season['season_number'])
+            columns['season_name'].append(intern(season['name']))
+            for episode in season['episodes']:
+                number = episode.get('episode_number')
+                columns['episode_number'].append(-1 if number is None else number)
+                columns['episode_name'].append(intern(episode.get('name')))
+            columns['season_episodes'].append(len(columns['episode_number']))
+        columns['show_seasons'].append(len(columns['season_number']))
+
+    blob = bytearray()
+    offsets = columns['string_offsets']
+    offsets.append(0)
+    for value in strings:  # dict 保持插入顺序，与下标一致
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+
+    counts = {
+        'strings': len(strings),
+        'shows': len(columns['show_query']),
+        'seasons': len(columns['season_number']),
+        'episodes': len(columns['episode_number'])
+    }
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(CatalogSnapshot.HEADER.pack(
+            CatalogSnapshot.MAGIC, CatalogSnapshot.VERSION,
+            counts['strings'], counts['shows'], counts['seasons'], counts['episodes']
+        ))
+        for name, _, _ in CatalogSnapshot.COLUMNS:
+            column = columns[name]
+            if sys.byteorder != 'little':
+                column.byteswap()
+            f.write(column.tobytes())
+        f.write(blob)
+    os.replace(temp_path, path)
+    return counts['shows']
+
+def diff_catalogs(old, new):
+    """ 比较两次运行的目录快照，逐条生成新增、删除和改名的剧集
+
+    剧集按 (TMDB ID, 语言) 对应；季摘要相同的季直接跳过，只有变化的季才会解码。
+    """
+    old_keys = old.show_keys()
+    new_keys = new.show_keys()
+    for key in list(new_keys) + [key for key in old_keys if key not in new_keys]:
+        show_id, language = key
+        old_index = old_keys.get(key)
+        new_index = new_keys.get(key)
+        old_seasons = old.season_digests(old_index) if old_index is not None else {}
+        new_seasons = new.season_digests(new_index) if new_index is not None else {}
+        show_name = (new.show(new_index) if new_index is not None else old.show(old_index))['show_name']
+
+        for season_number in sorted(old_seasons.keys() | new_seasons.keys()):
+            old_season = old_seasons.get(season_number)
+            new_season = new_seasons.get(season_number)
+            if old_season is not None and new_season is not None and old_season[0] == new_season[0]:
+                continue
+            old_episodes = dict(old.season_episodes(old_season[1])) if old_season is not None else {}
+            new_episodes = dict(new.season_episodes(new_season[1])) if new_season is not None else {}
+            for episode_number in sorted(old_episodes.keys() | new_episodes.keys(), key=lambda n: (n is None, n)):
+                old_name = old_episodes.get(episode_number)
+                new_name = new_episodes.get(episode_number)
+                if episode_number not in old_episodes:
+                    change = 'added'
+                elif episode_number not in new_episodes:
+                    change = 'removed'
+                elif old_name != new_name:
+                    change = 'renamed'
+                else:
+                    continue
+                yield {
+                    'change': change,
+                    'show_id': show_id,
+                    'show_name': show_name,
+                    'language': language,
+                    'season_number': season_number,
+                    'episode_number': episode_number,
+                    'old_name': old_name,
+                    'new_name': new_name
+                }
+
+class LRUCache:
+    """ 线程安全的 LRU 缓存，按总成本限制容量，可选过期时间 """
+
+    def __init__(self, max_cost, ttl=None, cost=None):
+        self.max_cost = max_cost
+        self.ttl = ttl
+        self.cost = cost or (lambda value: 1)
+        self.total_cost = 0
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (value, cost, expires_at)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            value, cost, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                self.total_cost -= cost
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        cost = self.cost(value)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_cost -= old[1]
+            if cost > self.max_cost:
+                return
+            self.entries[key] = (value, cost, expires_at)
+            self.total_cost += cost
+            while self.total_cost > self.max_cost:
+                _, (_, evicted_cost, _) = self.entries.popitem(last=False)
+                self.total_cost -= evicted_cost
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_cost = 0
+
+class ThumbnailDiskCache:
+    """ 磁盘缩略图缓存，总大小超过上限时删除最久未使用的文件 """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def path(self, key):
+        extension = os.path.splitext(key)[1] or '.img'
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + extension)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # 以修改时间记录最近使用
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Failed to write thumbnail cache: {str(e)}")
+            return
+        with self.lock:
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self.prune()
+
+    def prune(self):
+        """ 删除最旧的文件，直到总大小降到上限的 90% """
+        entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self.total_bytes = total
+
+class RequestCoalescer:
+    """ 合并同时进行的相同请求：只有第一个调用者真正执行，其余等待同一结果 """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def run(self, key, func):
+        with self.lock:
+            future = self.pending.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.pending[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.pending[key]
+
+_MISSING = object()
+
+class EpisodeService:
+    """ 服务模式的共享状态：所有客户端共用缓存、速率限制和连接池 """
+
+    def __init__(self, fetcher, cache):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.coalescer = RequestCoalescer()
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'upstream_fetches': 0}
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_episodes(self, show_name, language):
+        """ 返回与 EpisodeFetcher.get_show_episodes 相同的结果，未找到时为 None """
+        self.count('requests')
+        key = (show_name.strip().casefold(), language)
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            self.count('cache_hits')
+            return cached
+
+        def load():
+            # 前一个相同请求可能刚刚写入缓存
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+            self.count('upstream_fetches')
+            result = self.fetcher.get_show_episodes(show_name, language)
+            self.cache.put(key, result)
+            return result
+
+        return self.coalescer.run(key, load)
+
+class EpisodeRequestHandler(BaseHTTPRequestHandler):
+    """ 处理 GET /shows/{name}/episodes?lang= 和 GET /stats """
+
+    EPISODES_PATH = re.compile(r'^/shows/(?P<name>[^/]+)/episodes/?$')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        service = self.server.service
+        if url.path == '/stats':
+            with service.stats_lock:
+                stats = dict(service.stats, cached_shows=len(service.cache))
+            stats['credentials'] = service.fetcher.credentials.status()
+            self.send_json(200, stats)
+            return
+
+        match = self.EPISODES_PATH.match(url.path)
+        if match is None:
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        show_name = unquote(match.group('name'))
+        language = parse_qs(url.query).get('lang', ['zh-CN'])[0]
+        try:
+            result = service.get_episodes(show_name, language)
+        except requests.RequestException as e:
+            # 完整的错误信息只写日志，其中的请求地址带有 api_key
+            logging.error(f"Upstream error for {show_name}: {str(e)}")
+            self.send_json(502, {'error': f'upstream error: {describe_error(e)}'})
+            return
+        except Exception as e:
+            logging.error(f"Error serving {show_name}: {str(e)}")
+            logging.error(traceback.format_exc())
+            self.send_json(500, {'error': 'internal error'})
+            return
+
+        if result is None:
+            self.send_json(404, {'error': f'show not found: {show_name}'})
+        else:
+            self.send_json(200, result)
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
 
 class FetchEpisodesThread(QThread):
-    update_results = pyqtSignal(list)  # 更新结果信号
+    update_results = pyqtSignal(list, object)  # 更新结果信号：季列表和剧集信息
 
-    def __init__(self, show_name, language, api_key):
-        super().__init__()
+    def __init__(self, show_name, language, api_key, parent=None):
+        super().__init__(parent)
         self.show_name = show_name
         self.language = language
         self.api_key = api_key
-        self.base_url = "https://api.themoviedb.org/3"
         self.session = None  # 延迟初始化 session
-        
+        self.show_info = None
+
     def run(self):
         logging.info(f"Starting fetch thread for show: {self.show_name}")
         import requests  # 在线程中导入 requests
@@ -86,7 +1511,7 @@ class FetchEpisodesThread(QThread):
         try:
             episodes = self.get_show_episodes()
             logging.info(f"Found {len(episodes)} seasons")
-            self.update_results.emit(episodes)
+            self.update_results.emit(episodes, self.show_info)
         except Exception as e:
             logging.error(f"Error in fetch thread: {str(e)}")
             logging.error(traceback.format_exc())
@@ -95,77 +1520,23 @@ class FetchEpisodesThread(QThread):
             logging.info("Fetch thread completed")
 
     def get_show_episodes(self):
-        search_url = f"{self.base_url}/search/tv"
-        params = {
-            'api_key': self.api_key,
-            'query': self.show_name,
-            'language': self.language
-        }
-        
-        logging.info(f"Searching for show: {self.show_name} in language: {self.language}")
+        fetcher = EpisodeFetcher(self.api_key, self.session)
         try:
-            response = self.session.get(search_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'results' in data and data['results']:
-                show_id = data['results'][0]['id']
-                show_name = data['results'][0]['name']
-                logging.info(f"Found show: {show_name} (ID: {show_id})")
-                return self.fetch_season_episodes(show_id)
-            
-            logging.warning(f"No results found for: {self.show_name}")
-            return []
-
+            show = fetcher.get_show_episodes(self.show_name, self.language)
         except requests.RequestException as e:
             logging.error(f"Network error in get_show_episodes: {str(e)}")
             return []
-
-    def fetch_season_episodes(self, show_id):
-        seasons_url = f"{self.base_url}/tv/{show_id}"
-        params = {
-            'api_key': self.api_key,
-            'language': self.language
-        }
-        
-        logging.info(f"Fetching seasons for show ID: {show_id}")
-        try:
-            seasons_response = self.session.get(seasons_url, params=params)
-            seasons_response.raise_for_status()
-            seasons_data = seasons_response.json()
-            
-            if 'seasons' in seasons_data:
-                all_episodes = []
-                total_seasons = len(seasons_data['seasons'])
-                logging.info(f"Found {total_seasons} seasons")
-                
-                for i, season in enumerate(seasons_data['seasons'], 1):
-                    season_number = season['season_number']
-                    season_name = season['name']
-                    logging.info(f"Fetching episodes for season {season_number} ({i}/{total_seasons})")
-                    
-                    episodes_url = f"{self.base_url}/tv/{show_id}/season/{season_number}"
-                    episodes_response = self.session.get(episodes_url, params=params)
-                    episodes_response.raise_for_status()
-                    episodes_data = episodes_response.json()
-                    
-                    episode_count = len(episodes_data['episodes'])
-                    logging.info(f"Found {episode_count} episodes in season {season_number}")
-                    
-                    season_episodes = [episode['name'] for episode in episodes_data['episodes']]
-                    all_episodes.append(f"第{season_number}季——{season_name}：\n" + "\n".join(season_episodes))
-
-                return all_episodes
-            
-            logging.warning(f"No seasons found for show ID: {show_id}")
-            return []
-
-        except requests.RequestException as e:
-            logging.error(f"Network error while fetching seasons: {str(e)}")
+        if show is None:
             return []
+        self.show_info = {
+            'show_id': show['show_id'],
+            'show_name': show['show_name'],
+            'language': show['language']
+        }
+        return show['seasons']
 
 class ShowEpisodesApp(QWidget):
-    def __init__(self):
+    def __init__(self, async_mode=False, credentials=None):
         try:
             super().__init__()
             logging.info("Initializing main window")
@@ -174,6 +1545,9 @@ class ShowEpisodesApp(QWidget):
             if os.path.exists(icon_path):
                 self.setWindowIcon(QIcon(icon_path))
             self.is_dark_mode = False
+            self.async_mode = async_mode
+            self.credentials = credentials  # 为 None 时从 api_key.txt 读取
+            self.search_tasks = set()  # 异步模式下进行中的查询，保留引用以免任务被回收
             self.setup_delayed_init()
         except Exception as e:
             logging.error(f"Error in initialization: {str(e)}")
@@ -184,11 +1558,13 @@ class ShowEpisodesApp(QWidget):
     def setup_delayed_init(self):
         logging.info("Starting delayed initialization")
         try:
-            logging.info("Loading API key...")
-            self.api_key = self.load_api_key()
-            if not self.api_key:
-                logging.info("No API key found, requesting from user...")
-                self.api_key = self.get_api_key()
+            if self.credentials is None:
+                logging.info("Loading API key...")
+                self.api_key = self.load_api_key()
+                if not self.api_key:
+                    logging.info("No API key found, requesting from user...")
+                    self.api_key = self.get_api_key()
+                self.credentials = self.load_credentials()
             
             logging.info("Initializing UI...")
             self.initUI()
@@ -198,6 +1574,10 @@ class ShowEpisodesApp(QWidget):
             
             self.episodes_window = None
             self.fetch_thread = None
+            self.snapshot = None
+            # 异步模式下查询协程直接在界面线程中执行，不再为每次查询创建线程
+            self.async_fetcher = None
+            self.setup_async_fetcher()
             logging.info("Delayed initialization completed successfully")
         except Exception as e:
             logging.error(f"Error during delayed initialization: {str(e)}")
@@ -207,8 +1587,9 @@ class ShowEpisodesApp(QWidget):
     def setup_styles(self):
         logging.info(f"Setting up styles (Dark mode: {self.is_dark_mode})")
         try:
-            if self.is_dark_mode:
-                self.setStyleSheet("""
+            # 两套样式表合并后只解析一次，切换主题时只更新 darkMode 属性
+            if not self.styleSheet():
+                dark_stylesheet = """
                     QWidget {
                         background-color: #1e1e1e;
                         font-family: 'Microsoft YaHei', Arial;
@@ -326,9 +1707,8 @@ class ShowEpisodesApp(QWidget):
                         font-size: 24px;
                         font-weight: bold;
                     }
-                """)
-            else:
-                self.setStyleSheet("""
+                """
+                light_stylesheet = """
                     QWidget {
                         background-color: white;
                         font-family: 'Microsoft YaHei', Arial;
@@ -438,7 +1818,10 @@ class ShowEpisodesApp(QWidget):
                         font-size: 24px;
                         font-weight: bold;
                     }
-                """)
+                """
+                stylesheet, self.theme_backgrounds = themed_stylesheet(light_stylesheet, dark_stylesheet)
+                self.setStyleSheet(stylesheet)
+            apply_theme(self, self.is_dark_mode, self.theme_backgrounds)
             logging.info("Styles setup completed")
         except Exception as e:
             logging.error(f"Error during style setup: {str(e)}")
@@ -519,12 +1902,17 @@ class ShowEpisodesApp(QWidget):
             button_layout = QHBoxLayout()
             self.search_button = QPushButton("查询剧集名称")
             self.search_button.setFixedHeight(40)
+            self.snapshot_button = QPushButton("打开目录快照")
+            self.snapshot_button.setFixedHeight(40)
+            self.snapshot_button.setToolTip("从目录快照中打开剧集，不访问网络")
             button_layout.addStretch()
             button_layout.addWidget(self.search_button)
+            button_layout.addWidget(self.snapshot_button)
             button_layout.addStretch()
             main_layout.addLayout(button_layout)
 
             self.search_button.clicked.connect(self.on_search)
+            self.snapshot_button.clicked.connect(self.open_snapshot)
 
             # 设置窗口
             self.setLayout(main_layout)
@@ -548,19 +1936,18 @@ class ShowEpisodesApp(QWidget):
         )
 
     def load_api_key(self):
-        api_key_file = get_api_key_path()
-        logging.info(f"Checking for API key file: {api_key_file}")
-        if os.path.exists(api_key_file):
-            try:
-                with open(api_key_file, 'r', encoding='utf-8') as f:
-                    api_key = f.readline().strip()
-                    logging.info("API key loaded successfully")
-                    return api_key
-            except Exception as e:
-                logging.error(f"Error reading API key file: {str(e)}")
-                return None
-        logging.info("API key file not found")
-        return None
+        return read_api_key()
+
+    def setup_async_fetcher(self):
+        # 没有凭据时不创建，查询前补充凭据后再创建
+        if self.async_mode and self.credentials is not None:
+            self.async_fetcher = AsyncEpisodeFetcher(self.credentials)
+
+    def load_credentials(self):
+        """ api_key.txt 中的全部凭据组成凭据池，所有查询和详情线程共用 """
+        if not self.api_key:
+            return None
+        return CredentialPool(read_credentials() or [self.api_key])
 
     def get_api_key(self):
         logging.info("Requesting API key from user")
@@ -580,56 +1967,857 @@ class ShowEpisodesApp(QWidget):
         logging.info("User cancelled API key input")
         return None
 
-    def on_search(self):
-        show_name = self.show_name_input.text()
-        selected_language = self.language_selector.currentText()
-        language_code = self.language_codes[selected_language]
-        
-        logging.info(f"Starting search for show: {show_name}")
-        logging.info(f"Selected language: {selected_language} ({language_code})")
-        
-        if not show_name:
-            logging.warning("Empty show name")
-            QMessageBox.warning(self, '警告', '请输入剧集名称')
+    def on_search(self):
+        show_name = self.show_name_input.text()
+        selected_language = self.language_selector.currentText()
+        language_code = self.language_codes[selected_language]
+        
+        logging.info(f"Starting search for show: {show_name}")
+        logging.info(f"Selected language: {selected_language} ({language_code})")
+        
+        if not show_name:
+            logging.warning("Empty show name")
+            QMessageBox.warning(self, '警告', '请输入剧集名称')
+            return
+            
+        if self.credentials is None:
+            # 启动时取消了输入 API 密钥，查询前再询问一次
+            self.api_key = self.get_api_key()
+            self.credentials = self.load_credentials()
+            if self.credentials is None:
+                logging.warning("Search without API key")
+                QMessageBox.warning(self, '警告', '请先输入TMDB API密钥')
+                return
+            self.setup_async_fetcher()
+
+        self.current_show_label.setText(f"当前剧集名称：{show_name}")
+
+        if self.async_fetcher is not None:
+            task = asyncio.ensure_future(self.search_async(show_name, language_code))
+            self.search_tasks.add(task)
+            task.add_done_callback(self.search_tasks.discard)
+            return
+
+        logging.info("Starting fetch thread")
+        
+        # 开始线程来获取剧集名称
+        # 线程挂在主窗口下，运行中不会因为开始新查询而被销毁，结束后由 Qt 释放
+        self.fetch_thread = FetchEpisodesThread(show_name, language_code, self.credentials, self)
+        self.fetch_thread.update_results.connect(self.open_episodes_window)
+        self.fetch_thread.finished.connect(self.fetch_thread.deleteLater)
+        self.fetch_thread.start()
+
+    async def search_async(self, show_name, language):
+        logging.info(f"Starting async search for show: {show_name}")
+        try:
+            show = await self.async_fetcher.get_show_episodes(show_name, language)
+        except (aiohttp.ClientError, asyncio.TimeoutError, CredentialsExhausted) as e:
+            logging.error(f"Network error in async search: {str(e)}")
+            show = None
+        except Exception as e:
+            logging.error(f"Error in async search: {str(e)}")
+            logging.error(traceback.format_exc())
+            return
+
+        if show is None:
+            self.open_episodes_window([])
+        else:
+            logging.info(f"Found {len(show['seasons'])} seasons")
+            self.open_episodes_window(
+                show['seasons'],
+                {
+                    'show_id': show['show_id'],
+                    'show_name': show['show_name'],
+                    'language': show['language']
+                }
+            )
+
+    def get_episodes_window(self):
+        """ 整个会话共用一个结果窗口，关闭后再次查询时重新显示 """
+        if self.episodes_window is None:
+            self.episodes_window = EpisodesWindow(self.is_dark_mode, self.credentials)
+        self.episodes_window.show()
+        self.episodes_window.raise_()
+        self.episodes_window.activateWindow()
+        return self.episodes_window
+
+    def open_episodes_window(self, episodes, show_info=None):
+        logging.info(f"Opening episodes window with {len(episodes)} seasons")
+        title = show_info['show_name'] if show_info else (self.show_name_input.text() or "剧集列表")
+        self.get_episodes_window().show_result(episodes, show_info, title)
+
+    def open_snapshot(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "打开目录快照",
+            "",
+            "Catalog Snapshots (*.tmdbcat);;All Files (*)"
+        )
+        if not file_name:
+            logging.info("Open snapshot cancelled by user")
+            return
+
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        try:
+            snapshot = CatalogSnapshot(file_name)
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to open snapshot: {str(e)}")
+            QMessageBox.critical(self, '打开失败', f'无法打开目录快照：{str(e)}')
+            return
+        logging.info(f"Opened snapshot {file_name} with {len(snapshot)} shows")
+
+        # 输入框中有剧集名称时直接查找，否则让用户从列表中选择
+        show_name = self.show_name_input.text().strip()
+        index = snapshot.find(show_name) if show_name else None
+        if index is None:
+            labels = [f"{show['show_name']} ({show['language']})" for show in snapshot.shows()]
+            if not labels:
+                snapshot.close()
+                QMessageBox.warning(self, '警告', '快照中没有剧集。')
+                return
+            label, ok = QInputDialog.getItem(self, '选择剧集', '请选择要打开的剧集：', labels, 0, False)
+            if not ok:
+                snapshot.close()
+                return
+            index = labels.index(label)
+
+        self.snapshot = snapshot
+        self.current_show_label.setText(f"当前剧集名称：{snapshot.show(index)['show_name']}")
+        self.get_episodes_window().open_snapshot_show(snapshot, index)
+
+    def toggle_theme(self):
+        self.is_dark_mode = not self.is_dark_mode
+        self.theme_button.setText("☀️" if self.is_dark_mode else "🌙")
+        self.setup_styles()
+        # 如果有打开的剧集窗口，也需要更新其主题
+        if hasattr(self, 'episodes_window') and self.episodes_window is not None:
+            self.episodes_window.set_dark_mode(self.is_dark_mode)
+
+STYLE_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+BACKGROUND_COLOR = re.compile(r'background-color:\s*([^;]+);')
+
+def themed_stylesheet(light, dark):
+    """ 把浅色和深色样式表合并为一份，规则按窗口的 darkMode 属性区分
+
+    返回 (样式表, {是否深色: 窗口背景色})。窗口自身的背景由 apply_theme 用调色板设置。
+    """
+    rules = []
+    backgrounds = {}
+    for is_dark_mode, stylesheet in ((False, light), (True, dark)):
+        scope = '*[darkMode="true"]' if is_dark_mode else '*[darkMode="false"]'
+        for selectors, body in STYLE_RULE.findall(stylesheet):
+            selectors = [selector.strip() for selector in selectors.split(',')]
+            if 'QWidget' in selectors and is_dark_mode not in backgrounds:
+                match = BACKGROUND_COLOR.search(body)
+                if match:
+                    backgrounds[is_dark_mode] = match.group(1).strip()
+            rules.append(', '.join(f'{scope} {selector}' for selector in selectors) + ' {' + body + '}')
+    return '\n'.join(rules), backgrounds
+
+def apply_theme(window, is_dark_mode, backgrounds):
+    """ 切换窗口主题：更新 darkMode 属性和窗口背景，子控件按已解析的样式表重新应用样式 """
+    window.setProperty('darkMode', is_dark_mode)
+    palette = window.palette()
+    palette.setColor(QPalette.ColorRole.Window, QColor(backgrounds[is_dark_mode]))
+    window.setPalette(palette)
+    # 不能 unpolish 窗口本身，否则 Qt 会丢弃并重新解析窗口的样式表
+    for widget in window.findChildren(QWidget):
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+
+# 剧集列表中按角色取用的颜色，与窗口样式表的配色保持一致
+THEME_COLORS = {
+    False: {'title': '#1890ff', 'text': '#333'},
+    True: {'title': '#e0e0e0', 'text': '#e0e0e0'}
+}
+_theme_brushes = {}
+
+def theme_brush(is_dark_mode, role):
+    """ 返回主题颜色对应的画刷，所有模型共用同一份缓存 """
+    key = (is_dark_mode, role)
+    brush = _theme_brushes.get(key)
+    if brush is None:
+        brush = _theme_brushes[key] = QBrush(QColor(THEME_COLORS[is_dark_mode][role]))
+    return brush
+
+class EpisodeListModel(QAbstractListModel):
+    """ 剧集列表模型：颜色和字体在绘制时按角色提供，切换主题不需要重建内容 """
+
+    SEASON_ROW = 0
+    EPISODE_ROW = 1
+    RowKindRole = Qt.ItemDataRole.UserRole
+    ItemRole = Qt.ItemDataRole.UserRole + 1
+    SeasonRole = Qt.ItemDataRole.UserRole + 2
+
+    def __init__(self, seasons=None, is_dark_mode=False, parent=None):
+        super().__init__(parent)
+        self.is_dark_mode = is_dark_mode
+        self.season_font = QFont()
+        self.season_font.setPixelSize(18)
+        self.season_font.setBold(True)
+        self.all_rows = []  # (行类型, 显示文本, 所属季, 剧集数据)
+        self.season_rows = []  # 每一行所属季标题行的行号
+        self.rows = self.all_rows  # 当前可见的行，筛选时为 all_rows 的子集
+        self.set_seasons(seasons or [])
+
+    def set_seasons(self, seasons):
+        self.beginResetModel()
+        self.all_rows = []
+        self.season_rows = []
+        for season in seasons:
+            season_row = len(self.all_rows)
+            self.all_rows.append((
+                self.SEASON_ROW,
+                f"第{season['season_number']}季——{season['name']}：",
+                season,
+                None
+            ))
+            self.season_rows.append(season_row)
+            for episode in season['episodes']:
+                self.all_rows.append((self.EPISODE_ROW, episode['name'], season, episode))
+                self.season_rows.append(season_row)
+        self.rows = self.all_rows
+        self.endResetModel()
+
+    def episode_rows(self):
+        """ 返回所有剧集行的 (行号, 季数据, 剧集数据)，用于建立搜索索引 """
+        return [
+            (row, season, episode)
+            for row, (kind, text, season, episode) in enumerate(self.all_rows)
+            if kind == self.EPISODE_ROW
+        ]
+
+    def set_visible_rows(self, rows):
+        """ 只显示给定的剧集行（按行号升序）及其季标题，rows 为 None 时显示全部 """
+        self.beginResetModel()
+        if rows is None:
+            self.rows = self.all_rows
+        else:
+            self.rows = []
+            last_season_row = None
+            for row in rows:
+                season_row = self.season_rows[row]
+                if season_row != last_season_row:
+                    self.rows.append(self.all_rows[season_row])
+                    last_season_row = season_row
+                self.rows.append(self.all_rows[row])
+        self.endResetModel()
+
+    def set_dark_mode(self, is_dark_mode):
+        """ 只通知视图颜色角色已变化，视图仅重绘可见的行 """
+        if is_dark_mode == self.is_dark_mode:
+            return
+        self.is_dark_mode = is_dark_mode
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0), self.index(len(self.rows) - 1),
+                [Qt.ItemDataRole.ForegroundRole]
+            )
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if self.rows[index.row()][0] == self.SEASON_ROW:
+            return Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        kind, text, season, episode = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return theme_brush(self.is_dark_mode, 'title' if kind == self.SEASON_ROW else 'text')
+        if role == Qt.ItemDataRole.FontRole and kind == self.SEASON_ROW:
+            return self.season_font
+        if role == self.RowKindRole:
+            return kind
+        if role == self.ItemRole:
+            return season if kind == self.SEASON_ROW else episode
+        if role == self.SeasonRole:
+            return season
+        return None
+
+class EpisodeSearchIndex:
+    """ 剧集名称的 n-gram 倒排索引：逐字输入时在上一次结果中继续缩小范围 """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, entries):
+        """ entries 为 [(行号, [名称, ...])]，同一集在各语言中的名称一起索引 """
+        self.rows = []
+        self.texts = []  # 各条目合并后的小写名称，用于确认候选结果
+        self.postings = {}  # n-gram -> 条目编号列表（升序）
+        for row, names in entries:
+            entry = len(self.rows)
+            text = '\n'.join(name.casefold() for name in names if name)
+            self.rows.append(row)
+            self.texts.append(text)
+            grams = set()
+            for size in range(1, self.GRAM_SIZE + 1):
+                for i in range(len(text) - size + 1):
+                    grams.add(text[i:i + size])
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(entry)
+        self.last_query = ''
+        self.last_result = range(len(self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, query):
+        """ 返回名称中包含 query 的行号，保持原有顺序；query 为空时返回全部行 """
+        query = query.strip().casefold()
+        texts = self.texts
+        if not query:
+            result = range(len(self.rows))
+        elif len(query) <= self.GRAM_SIZE:
+            # 短查询本身就是索引中的 n-gram，倒排列表即为结果
+            result = self.postings.get(query, [])
+        else:
+            # 取最短的 n-gram 列表作为候选；输入只是追加了字符时，上一次的结果也是候选
+            size = self.GRAM_SIZE
+            candidates = min(
+                (self.postings.get(query[i:i + size], []) for i in range(len(query) - size + 1)),
+                key=len
+            )
+            if self.last_query and query.startswith(self.last_query) and len(self.last_result) < len(candidates):
+                candidates = self.last_result
+            result = [entry for entry in candidates if query in texts[entry]]
+        self.last_query = query
+        self.last_result = result
+        return [self.rows[entry] for entry in result]
+
+# 剧集数超过该值时，索引的建立和筛选都放到后台线程中进行
+FILTER_THREAD_MIN_ROWS = 500
+
+# 已请求停止但仍在运行的后台线程，结束前保留引用，不随父窗口销毁
+_stopped_threads = set()
+
+def retire_thread(thread):
+    """ 让已请求停止的线程自行结束：脱离父对象，结束后由 Qt 释放，界面线程不等待 """
+    thread.setParent(None)
+    _stopped_threads.add(thread)
+    thread.finished.connect(lambda: _stopped_threads.discard(thread))
+    thread.finished.connect(thread.deleteLater)
+    if thread.isFinished():
+        _stopped_threads.discard(thread)
+        thread.deleteLater()
+
+def wait_for_stopped_threads():
+    """ 程序退出前等待仍在收尾的后台线程，否则 Qt 会销毁运行中的线程并中止进程 """
+    for thread in list(_stopped_threads):
+        thread.wait()
+    _stopped_threads.clear()
+
+class EpisodeFilterThread(QThread):
+    """ 在后台建立搜索索引并执行筛选，只处理最近一次输入 """
+    filtered = pyqtSignal(str, object)  # 查询文本, 匹配的行号
+
+    def __init__(self, entries, parent=None):
+        super().__init__(parent)
+        self.entries = entries
+        self.condition = threading.Condition()
+        self.query = None
+        self.stopped = False
+
+    def search(self, query):
+        with self.condition:
+            self.query = query
+            self.condition.notify()
+
+    def stop(self):
+        """ 不等待线程结束：正在建立的索引完成后线程自行退出 """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def run(self):
+        start = time.perf_counter()
+        index = EpisodeSearchIndex(self.entries)
+        self.entries = None
+        logging.info(f"Built search index for {len(index)} episodes in {time.perf_counter() - start:.3f}s")
+        while True:
+            with self.condition:
+                while self.query is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                query, self.query = self.query, None
+            self.filtered.emit(query, index.search(query))
+
+# 所有剧集窗口共用的详情与剧照缓存：键分别为 (剧集 ID, 语言, 季号, 集号) 和剧照路径
+episode_details_cache = LRUCache(2000)
+image_cache = LRUCache(IMAGE_CACHE_BYTES, cost=lambda image: image.sizeInBytes())
+_thumbnail_cache = None
+
+def get_thumbnail_cache():
+    """ 延迟创建磁盘缩略图缓存，避免启动时创建目录 """
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailDiskCache(get_app_path('thumbnails'), THUMBNAIL_CACHE_BYTES)
+    return _thumbnail_cache
+
+class EpisodeDetailLoader(QThread):
+    """ 后台加载单集详情和剧照，只处理最近一次选择及其相邻剧集 """
+    details_loaded = pyqtSignal(object)  # 详情键
+    image_loaded = pyqtSignal(str)  # 剧照路径
+    details_failed = pyqtSignal(object)  # 详情键
+
+    def __init__(self, api_key, parent=None):
+        super().__init__(parent)
+        self.api_key = api_key
+        self.condition = threading.Condition()
+        self.pending = []
+        self.stopped = False
+
+    def request(self, keys):
+        """ 新的选择会取代尚未处理的预取请求 """
+        with self.condition:
+            self.pending = list(keys)
+            self.condition.notify()
+
+    def stop(self):
+        """ 不等待线程结束：进行中的请求最多在 DETAIL_REQUEST_TIMEOUT 秒后结束，线程随后退出 """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def run(self):
+        fetcher = EpisodeFetcher(self.api_key)
+        try:
+            while True:
+                with self.condition:
+                    while not self.pending and not self.stopped:
+                        self.condition.wait()
+                    if self.stopped:
+                        return
+                    key = self.pending.pop(0)
+                try:
+                    self.load(fetcher, key)
+                except Exception as e:
+                    logging.error(f"Error loading episode details {key}: {str(e)}")
+                    # 错误信息可能带有含凭据的请求地址，只写日志，界面只显示失败
+                    self.details_failed.emit(key)
+        finally:
+            fetcher.close()
+
+    def load(self, fetcher, key):
+        details = episode_details_cache.get(key)
+        if details is None:
+            show_id, language, season_number, episode_number = key
+            details = fetcher.fetch_episode_details(show_id, season_number, episode_number, language)
+            episode_details_cache.put(key, details)
+            self.details_loaded.emit(key)
+
+        still_path = details.get('still_path')
+        if not still_path or image_cache.get(still_path) is not None:
+            return
+        thumbnail_cache = get_thumbnail_cache()
+        data = thumbnail_cache.get(still_path)
+        if data is None:
+            data = fetcher.fetch_image(still_path)
+            thumbnail_cache.put(still_path, data)
+        # QImage 可以在工作线程中解码，界面线程只需转换为 QPixmap
+        image = QImage.fromData(data)
+        if image.isNull():
+            raise ValueError(f"Failed to decode image: {still_path}")
+        if image.width() > DETAIL_IMAGE_WIDTH:
+            image = image.scaledToWidth(DETAIL_IMAGE_WIDTH, Qt.TransformationMode.SmoothTransformation)
+        image_cache.put(still_path, image)
+        self.image_loaded.emit(still_path)
+
+# 结果窗口最多保留的标签页数，超过后复用最久未查看的页面
+MAX_RESULT_TABS = 8
+
+class EpisodesPage(QWidget):
+    """ 单个查询结果的页面，显示新结果时复用全部控件 """
+
+    def __init__(self, results_window):
+        super().__init__()
+        self.results_window = results_window
+        self.episodes = []
+        self.show_info = None  # {'show_id', 'show_name', 'language'}，用于加载单集详情
+        self.current_detail_key = None
+        self.detail_failed = False  # 当前剧集是否加载失败，重新选择时清除
+        self.details_enabled = False
+        self.search_index = None
+        self.filter_thread = None
+        self.initUI()
+
+    @property
+    def result_key(self):
+        if not self.show_info:
+            return None
+        return (self.show_info['show_id'], self.show_info['language'])
+
+    def initUI(self):
+        page_layout = QVBoxLayout(self)
+        page_layout.setSpacing(0)
+        page_layout.setContentsMargins(0, 15, 0, 0)
+
+        # 内容框架
+        content_frame = QFrame()
+        content_frame.setObjectName("contentFrame")
+        content_layout = QVBoxLayout(content_frame)
+        content_layout.setSpacing(0)
+        content_layout.setContentsMargins(25, 25, 25, 25)
+
+        # 筛选框：按剧集名称（包括已获取的其他语言名称）逐字筛选
+        self.filter_input = QLineEdit()
+        self.filter_input.setObjectName("filterInput")
+        self.filter_input.setPlaceholderText("筛选剧集名称…")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.apply_filter)
+        content_layout.addWidget(self.filter_input)
+        content_layout.addSpacing(15)
+
+        # 剧集列表：颜色和字体由模型按角色提供，切换主题时无需重新生成内容
+        self.episodes_model = EpisodeListModel([], self.results_window.is_dark_mode, self)
+        self.episodes_view = QListView()
+        self.episodes_view.setModel(self.episodes_model)
+        self.episodes_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.episodes_view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.episodes_view.setMinimumHeight(400)
+        self.episodes_view.selectionModel().currentChanged.connect(self.on_episode_selected)
+
+        # 详情面板：选中某一集时才加载简介和剧照
+        self.detail_frame = QFrame()
+        self.detail_frame.setFixedWidth(DETAIL_IMAGE_WIDTH + 20)
+        detail_layout = QVBoxLayout(self.detail_frame)
+        detail_layout.setSpacing(10)
+        detail_layout.setContentsMargins(20, 0, 0, 0)
+        self.detail_image = QLabel()
+        self.detail_image.setObjectName("detailImage")
+        self.detail_image.setFixedSize(DETAIL_IMAGE_WIDTH, DETAIL_IMAGE_WIDTH * 9 // 16)
+        self.detail_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.detail_title = QLabel()
+        self.detail_title.setObjectName("detailTitle")
+        self.detail_title.setWordWrap(True)
+        self.detail_meta = QLabel()
+        self.detail_meta.setObjectName("detailText")
+        self.detail_overview = QLabel()
+        self.detail_overview.setObjectName("detailText")
+        self.detail_overview.setWordWrap(True)
+        self.detail_overview.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        detail_layout.addWidget(self.detail_image)
+        detail_layout.addWidget(self.detail_title)
+        detail_layout.addWidget(self.detail_meta)
+        detail_layout.addWidget(self.detail_overview, 1)
+
+        list_layout = QHBoxLayout()
+        list_layout.setSpacing(0)
+        list_layout.setContentsMargins(0, 0, 0, 0)
+        list_layout.addWidget(self.episodes_view, 1)
+        list_layout.addWidget(self.detail_frame)
+        content_layout.addLayout(list_layout)
+
+        page_layout.addWidget(content_frame)
+
+        # 按钮区域
+        button_layout = QHBoxLayout()
+        button_layout.setContentsMargins(0, 20, 0, 0)
+        self.export_button = QPushButton("导出剧集名称")
+        self.export_button.setFixedHeight(45)
+        self.export_button.setFixedWidth(160)
+        self.export_button.clicked.connect(self.export_to_txt)
+        button_layout.addStretch()
+        button_layout.addWidget(self.export_button)
+        button_layout.addStretch()
+        page_layout.addLayout(button_layout)
+
+        self.set_result([], None)
+
+    def set_result(self, episodes, show_info):
+        """ 用新的结果替换页面内容，只重置模型，不重建控件 """
+        self.episodes = episodes
+        self.show_info = show_info
+        self.current_detail_key = None
+        self.detail_failed = False
+        self.reset_search()
+        self.episodes_model.set_seasons(episodes)
+        self.episodes_view.scrollToTop()
+        self.details_enabled = bool(show_info and self.results_window.api_key)
+        self.detail_frame.setVisible(self.details_enabled)
+        self.detail_title.setText("选择一集查看详情")
+        self.detail_meta.clear()
+        self.detail_overview.clear()
+        self.detail_image.clear()
+
+    def reset_search(self):
+        """ 丢弃已建立的索引并清空筛选框，下次输入时重新建立索引 """
+        self.stop_filter()
+        self.search_index = None
+        self.filter_input.blockSignals(True)
+        self.filter_input.clear()
+        self.filter_input.blockSignals(False)
+        self.episodes_model.set_visible_rows(None)
+
+    def stop_filter(self):
+        # 断开信号后让线程自行结束，界面线程不等待索引建立完成
+        if self.filter_thread is not None:
+            self.filter_thread.filtered.disconnect(self.on_filtered)
+            self.filter_thread.stop()
+            retire_thread(self.filter_thread)
+            self.filter_thread = None
+
+    def search_entries(self):
+        """ 每一集的名称加上同一剧集在其他语言中的名称 """
+        other_names = self.results_window.other_language_names(self.show_info)
+        entries = []
+        for row, season, episode in self.episodes_model.episode_rows():
+            names = [episode['name']]
+            names.extend(other_names.get((season['season_number'], episode.get('episode_number')), ()))
+            entries.append((row, names))
+        return entries
+
+    def apply_filter(self, text):
+        if not text.strip():
+            self.episodes_model.set_visible_rows(None)
+            return
+        if self.filter_thread is not None:
+            self.filter_thread.search(text)
+            return
+        if self.search_index is None:
+            entries = self.search_entries()
+            if len(entries) >= FILTER_THREAD_MIN_ROWS:
+                self.filter_thread = EpisodeFilterThread(entries, self)
+                self.filter_thread.filtered.connect(self.on_filtered)
+                self.filter_thread.start()
+                self.filter_thread.search(text)
+                return
+            self.search_index = EpisodeSearchIndex(entries)
+        self.episodes_model.set_visible_rows(self.search_index.search(text))
+
+    def on_filtered(self, query, rows):
+        # 后台结果返回前输入可能已经改变，只应用与当前输入一致的结果
+        if query == self.filter_input.text():
+            self.episodes_model.set_visible_rows(rows)
+
+    def detail_key(self, index):
+        """ 返回选中行的详情键，季标题行或缺少集号时返回 None """
+        if index.data(EpisodeListModel.RowKindRole) != EpisodeListModel.EPISODE_ROW:
+            return None
+        episode = index.data(EpisodeListModel.ItemRole)
+        if episode.get('episode_number') is None:
+            return None
+        season = index.data(EpisodeListModel.SeasonRole)
+        return (
+            self.show_info['show_id'], self.show_info['language'],
+            season['season_number'], episode['episode_number']
+        )
+
+    def on_episode_selected(self, current, previous):
+        if not self.details_enabled or not current.isValid():
+            return
+        key = self.detail_key(current)
+        if key is None:
+            return
+        self.current_detail_key = key
+        self.detail_failed = False
+        self.show_details()
+
+        # 先加载选中的一集，再预取前后相邻的几集
+        keys = [key]
+        row = current.row()
+        for offset in (1, -1, 2, -2):
+            neighbor = self.episodes_model.index(row + offset)
+            neighbor_key = self.detail_key(neighbor) if neighbor.isValid() else None
+            if neighbor_key is not None and episode_details_cache.get(neighbor_key) is None:
+                keys.append(neighbor_key)
+
+        self.results_window.request_details(keys)
+
+    def on_details_loaded(self, key):
+        if key == self.current_detail_key:
+            self.show_details()
+
+    def on_image_loaded(self, still_path):
+        details = episode_details_cache.get(self.current_detail_key)
+        if details is not None and details.get('still_path') == still_path:
+            self.show_details()
+
+    def on_details_failed(self, key):
+        # 失败不写入缓存，再次选中这一集时会重新请求
+        if key == self.current_detail_key:
+            self.detail_failed = True
+            self.show_details()
+
+    def show_details(self):
+        details = episode_details_cache.get(self.current_detail_key)
+        if details is None:
+            self.detail_title.setText(self.episodes_view.currentIndex().data() or "")
+            self.detail_meta.setText("加载失败，请重新选择这一集重试" if self.detail_failed else "正在加载…")
+            self.detail_overview.clear()
+            self.detail_image.clear()
+            return
+
+        self.detail_title.setText(details.get('name') or "")
+        meta = []
+        if details.get('air_date'):
+            meta.append(f"首播：{details['air_date']}")
+        if details.get('runtime'):
+            meta.append(f"{details['runtime']} 分钟")
+        if details.get('vote_average'):
+            meta.append(f"评分：{details['vote_average']:.1f}")
+        self.detail_meta.setText("  ·  ".join(meta))
+        self.detail_overview.setText(details.get('overview') or "暂无简介")
+
+        still_path = details.get('still_path')
+        image = image_cache.get(still_path) if still_path else None
+        if image is not None:
+            self.detail_image.setPixmap(QPixmap.fromImage(image))
+        else:
+            self.detail_image.clear()
+            if not still_path:
+                self.detail_image.setText("暂无剧照")
+            else:
+                self.detail_image.setText("剧照加载失败" if self.detail_failed else "正在加载剧照…")
+
+    def export_to_txt(self):
+        if not self.episodes:
+            logging.warning("No episodes to export")
+            QMessageBox.warning(self, '警告', '没有可导出的剧集名称。')
             return
             
-        self.current_show_label.setText(f"当前剧集名称：{show_name}")
-        logging.info("Starting fetch thread")
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, 
+            "保存剧集名称", 
+            "", 
+            "Text Files (*.txt);;All Files (*)"
+        )
         
-        # 开始线程来获取剧集名称
-        self.fetch_thread = FetchEpisodesThread(show_name, language_code, self.api_key)
-        self.fetch_thread.update_results.connect(self.open_episodes_window)
-        self.fetch_thread.start()
-
-    def open_episodes_window(self, episodes):
-        logging.info(f"Opening episodes window with {len(episodes)} seasons")
-        self.episodes_window = EpisodesWindow(episodes, self.is_dark_mode)
-        self.episodes_window.show()
-
-    def toggle_theme(self):
-        self.is_dark_mode = not self.is_dark_mode
-        self.theme_button.setText("☀️" if self.is_dark_mode else "🌙")
-        self.setup_styles()
-        # 如果有打开的剧集窗口，也需要更新其主题
-        if hasattr(self, 'episodes_window') and self.episodes_window is not None:
-            self.episodes_window.is_dark_mode = self.is_dark_mode
-            self.episodes_window.setup_styles()
+        if file_name:
+            logging.info(f"Exporting episodes to: {file_name}")
+            try:
+                with open(file_name, 'w', encoding='utf-8') as f:
+                    for season in self.episodes:
+                        f.write(format_season(season) + '\n')
+                logging.info("Export completed successfully")
+                QMessageBox.information(
+                    self, 
+                    '导出成功', 
+                    '剧集名称已成功导出为TXT文件。'
+                )
+            except Exception as e:
+                logging.error(f"Export failed: {str(e)}")
+                logging.error(traceback.format_exc())
+                QMessageBox.critical(
+                    self, 
+                    '导出失败', 
+                    f'导出过程中发生错误：{str(e)}'
+                )
+        else:
+            logging.info("Export cancelled by user")
 
 class EpisodesWindow(QWidget):
-    def __init__(self, episodes, is_dark_mode=False):
+    """ 整个会话共用的结果窗口：每个结果一个标签页，数量有上限，页面循环复用 """
+
+    def __init__(self, is_dark_mode=False, api_key=None):
         super().__init__()
         # 从资源路径加载图标
         icon_path = resource_path('logo.ico')
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
-        self.episodes = episodes
         self.is_dark_mode = is_dark_mode
+        self.api_key = api_key
+        self.detail_loader = None
+        self.recent_pages = []  # 按查看时间排列，最后一个是最近查看的
+        self.spare_pages = []  # 关闭标签页后留待复用的页面
+        self.episode_names = {}  # 剧集 ID -> {语言: {(季号, 集号): 名称}}，供筛选时跨语言匹配
         self.initUI()
         self.setup_styles()
 
+    def show_result(self, episodes, show_info=None, title=None):
+        """ 在标签页中显示结果并返回页面；同一剧集已打开时直接刷新该页 """
+        key = (show_info['show_id'], show_info['language']) if show_info else None
+        page = None
+        if key is not None:
+            page = next((page for page in self.recent_pages if page.result_key == key), None)
+        if page is None:
+            if self.tabs.count() < MAX_RESULT_TABS:
+                page = self.spare_pages.pop() if self.spare_pages else EpisodesPage(self)
+                self.tabs.addTab(page, "")
+            else:
+                page = self.recent_pages[0]
+                logging.info(f"Reusing result tab: {self.tabs.tabText(self.tabs.indexOf(page))}")
+
+        if show_info:
+            self.record_episode_names(episodes, show_info)
+        page.set_result(episodes, show_info)
+        self.tabs.setTabText(self.tabs.indexOf(page), title or "剧集列表")
+        self.tabs.setCurrentWidget(page)
+        self.touch_page(page)
+        return page
+
+    def record_episode_names(self, episodes, show_info):
+        """ 记录这一语言的剧集名称，同一剧集其他语言的页面需要重建索引 """
+        names = {}
+        for season in episodes:
+            for episode in season['episodes']:
+                names[(season['season_number'], episode.get('episode_number'))] = episode['name']
+        self.episode_names.setdefault(show_info['show_id'], {})[show_info['language']] = names
+        open_shows = {show_info['show_id']}
+        for page in self.recent_pages:
+            if page.show_info:
+                open_shows.add(page.show_info['show_id'])
+                if page.show_info['show_id'] == show_info['show_id']:
+                    page.reset_search()
+        # 标签页被复用后，已关闭剧集的名称不再需要
+        for show_id in list(self.episode_names):
+            if show_id not in open_shows:
+                del self.episode_names[show_id]
+
+    def other_language_names(self, show_info):
+        """ 返回 {(季号, 集号): [名称, ...]}，包含同一剧集已获取的其他语言名称 """
+        if not show_info:
+            return {}
+        result = {}
+        for language, names in self.episode_names.get(show_info['show_id'], {}).items():
+            if language == show_info['language']:
+                continue
+            for key, name in names.items():
+                result.setdefault(key, []).append(name)
+        return result
+
+    def open_snapshot_show(self, snapshot, index):
+        """ 直接从目录快照中打开一部剧集，只解码这一部剧集的数据 """
+        show = snapshot.show(index)
+        return self.show_result(snapshot.seasons(index), show, show['show_name'])
+
+    def touch_page(self, page):
+        if page in self.recent_pages:
+            self.recent_pages.remove(page)
+        self.recent_pages.append(page)
+
+    def on_tab_changed(self, index):
+        page = self.tabs.widget(index)
+        if page is not None:
+            self.touch_page(page)
+
+    def close_tab(self, index):
+        page = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        self.recent_pages.remove(page)
+        page.set_result([], None)
+        self.spare_pages.append(page)
+
+    def set_dark_mode(self, is_dark_mode):
+        self.is_dark_mode = is_dark_mode
+        self.setup_styles()
+        for page in self.recent_pages + self.spare_pages:
+            page.episodes_model.set_dark_mode(is_dark_mode)
+
     def setup_styles(self):
-        if self.is_dark_mode:
-            self.setStyleSheet("""
+        # 两套样式表合并后只解析一次，切换主题时只更新 darkMode 属性
+        if not self.styleSheet():
+            dark_stylesheet = """
                 QWidget {
                     background-color: #1e1e1e;
                     font-family: 'Microsoft YaHei', Arial;
@@ -640,34 +2828,40 @@ class EpisodesWindow(QWidget):
                     font-weight: bold;
                     padding: 20px;
                 }
-                QTextEdit {
+                QListView {
                     border: none;
                     background-color: #2d2d2d;
                     font-size: 14px;
                     color: #e0e0e0;
-                    line-height: 1.6;
                     padding: 10px;
-                    selection-background-color: #404040;
-                    selection-color: #ffffff;
+                    outline: none;
+                }
+                QListView::item {
+                    padding: 8px 0;
+                    border-bottom: 1px solid #383838;
                 }
-                QTextEdit QScrollBar:vertical {
+                QListView::item:selected {
+                    background-color: #404040;
+                    color: #ffffff;
+                }
+                QListView QScrollBar:vertical {
                     width: 8px;
                     background: transparent;
                 }
-                QTextEdit QScrollBar::handle:vertical {
+                QListView QScrollBar::handle:vertical {
                     background: #404040;
                     border-radius: 4px;
                     min-height: 30px;
                 }
-                QTextEdit QScrollBar::handle:vertical:hover {
+                QListView QScrollBar::handle:vertical:hover {
                     background: #4a4a4a;
                 }
-                QTextEdit QScrollBar::add-line:vertical,
-                QTextEdit QScrollBar::sub-line:vertical {
+                QListView QScrollBar::add-line:vertical,
+                QListView QScrollBar::sub-line:vertical {
                     height: 0px;
                 }
-                QTextEdit QScrollBar::add-page:vertical,
-                QTextEdit QScrollBar::sub-page:vertical {
+                QListView QScrollBar::add-page:vertical,
+                QListView QScrollBar::sub-page:vertical {
                     background: none;
                 }
                 QPushButton {
@@ -690,10 +2884,53 @@ class EpisodesWindow(QWidget):
                     border: 1px solid #383838;
                     border-radius: 8px;
                 }
-            """)
-        else:
+                QTabWidget::pane {
+                    border: none;
+                }
+                QTabBar::tab {
+                    background-color: #2d2d2d;
+                    color: #aaa;
+                    padding: 8px 16px;
+                    margin-right: 2px;
+                    border: 1px solid #383838;
+                    border-bottom: none;
+                    border-top-left-radius: 6px;
+                    border-top-right-radius: 6px;
+                }
+                QTabBar::tab:selected {
+                    color: #1890ff;
+                    background-color: #323232;
+                }
+                QLabel#detailTitle {
+                    font-size: 16px;
+                    font-weight: bold;
+                    color: #e0e0e0;
+                    background: transparent;
+                }
+                QLabel#detailText {
+                    font-size: 13px;
+                    color: #b0b0b0;
+                    background: transparent;
+                }
+                QLabel#detailImage {
+                    background-color: #1e1e1e;
+                    color: #888;
+                    border-radius: 4px;
+                }
+                QLineEdit#filterInput {
+                    padding: 8px 15px;
+                    border: 1px solid #383838;
+                    border-radius: 6px;
+                    background-color: #1e1e1e;
+                    font-size: 14px;
+                    color: #e0e0e0;
+                }
+                QLineEdit#filterInput:focus {
+                    border-color: #1890ff;
+                }
+            """
             # 原有的浅色主题样式
-            self.setStyleSheet("""
+            light_stylesheet = """
                 QWidget {
                     background-color: #f0f2f5;
                     font-family: 'Microsoft YaHei', Arial;
@@ -705,33 +2942,39 @@ class EpisodesWindow(QWidget):
                     padding: 20px;
                     background: transparent;
                 }
-                QTextEdit {
+                QListView {
                     border: none;
                     background-color: white;
                     font-size: 14px;
                     color: #333;
-                    line-height: 1.6;
-                    selection-background-color: #e3f2fd;
-                    selection-color: #1a1a1a;
+                    outline: none;
+                }
+                QListView::item {
+                    padding: 8px 0;
+                    border-bottom: 1px solid #f0f0f0;
+                }
+                QListView::item:selected {
+                    background-color: #e3f2fd;
+                    color: #1a1a1a;
                 }
-                QTextEdit QScrollBar:vertical {
+                QListView QScrollBar:vertical {
                     width: 8px;
                     background: transparent;
                 }
-                QTextEdit QScrollBar::handle:vertical {
+                QListView QScrollBar::handle:vertical {
                     background: #d0d0d0;
                     border-radius: 4px;
                     min-height: 30px;
                 }
-                QTextEdit QScrollBar::handle:vertical:hover {
+                QListView QScrollBar::handle:vertical:hover {
                     background: #a8a8a8;
                 }
-                QTextEdit QScrollBar::add-line:vertical,
-                QTextEdit QScrollBar::sub-line:vertical {
+                QListView QScrollBar::add-line:vertical,
+                QListView QScrollBar::sub-line:vertical {
                     height: 0px;
                 }
-                QTextEdit QScrollBar::add-page:vertical,
-                QTextEdit QScrollBar::sub-page:vertical {
+                QListView QScrollBar::add-page:vertical,
+                QListView QScrollBar::sub-page:vertical {
                     background: none;
                 }
                 QPushButton {
@@ -755,19 +2998,52 @@ class EpisodesWindow(QWidget):
                     border-radius: 12px;
                     border: 1px solid #e8e8e8;
                 }
-                #seasonTitle {
-                    font-size: 18px;
+                QTabWidget::pane {
+                    border: none;
+                }
+                QTabBar::tab {
+                    background-color: #e8e8e8;
+                    color: #666;
+                    padding: 8px 16px;
+                    margin-right: 2px;
+                    border-top-left-radius: 6px;
+                    border-top-right-radius: 6px;
+                }
+                QTabBar::tab:selected {
                     color: #1890ff;
+                    background-color: white;
+                }
+                QLabel#detailTitle {
+                    font-size: 16px;
                     font-weight: bold;
-                    margin-top: 15px;
-                    margin-bottom: 10px;
+                    color: #1a1a1a;
+                    background: transparent;
+                }
+                QLabel#detailText {
+                    font-size: 13px;
+                    color: #666;
+                    background: transparent;
                 }
-                #episodeItem {
+                QLabel#detailImage {
+                    background-color: #f0f2f5;
+                    color: #999;
+                    border-radius: 4px;
+                }
+                QLineEdit#filterInput {
+                    padding: 8px 15px;
+                    border: 1px solid #d9d9d9;
+                    border-radius: 6px;
+                    background-color: white;
+                    font-size: 14px;
                     color: #333;
-                    padding: 8px 0;
-                    border-bottom: 1px solid #f0f0f0;
                 }
-            """)
+                QLineEdit#filterInput:focus {
+                    border-color: #1890ff;
+                }
+            """
+            stylesheet, self.theme_backgrounds = themed_stylesheet(light_stylesheet, dark_stylesheet)
+            self.setStyleSheet(stylesheet)
+        apply_theme(self, self.is_dark_mode, self.theme_backgrounds)
 
     def initUI(self):
         main_layout = QVBoxLayout()
@@ -780,55 +3056,13 @@ class EpisodesWindow(QWidget):
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(title_label)
 
-        # 内容框架
-        content_frame = QFrame()
-        content_frame.setObjectName("contentFrame")
-        content_layout = QVBoxLayout(content_frame)
-        content_layout.setSpacing(0)
-        content_layout.setContentsMargins(25, 25, 25, 25)
-
-        # 文本显示区域
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setMinimumHeight(400)
-        content_layout.addWidget(self.text_edit)
-
-        if self.episodes:
-            formatted_text = ""
-            for i, episode in enumerate(self.episodes):
-                if i > 0:
-                    formatted_text += "\n\n" + "─" * 80 + "\n\n"
-                # 分离季标题和剧集列表
-                season_parts = episode.split('：\n', 1)
-                if len(season_parts) == 2:
-                    season_title, episodes_list = season_parts
-                    # 根据主题模式设置不同的颜色
-                    title_color = "#e0e0e0" if self.is_dark_mode else "#1890ff"
-                    text_color = "#e0e0e0" if self.is_dark_mode else "#333"
-                    border_color = "#383838" if self.is_dark_mode else "#f0f0f0"
-                    
-                    formatted_text += f"<div style='color: {title_color}; font-size: 18px; font-weight: bold; margin: 10px 0;'>{season_title}：</div>\n"
-                    episodes = episodes_list.split('\n')
-                    for ep in episodes:
-                        formatted_text += f"<div style='color: {text_color}; padding: 8px 0; border-bottom: 1px solid {border_color};'>{ep}</div>\n"
-                else:
-                    formatted_text += episode
-
-            self.text_edit.setHtml(formatted_text)
-
-        main_layout.addWidget(content_frame)
-
-        # 按钮区域
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(0, 20, 0, 0)
-        self.export_button = QPushButton("导出剧集名称")
-        self.export_button.setFixedHeight(45)
-        self.export_button.setFixedWidth(160)
-        self.export_button.clicked.connect(self.export_to_txt)
-        button_layout.addStretch()
-        button_layout.addWidget(self.export_button)
-        button_layout.addStretch()
-        main_layout.addLayout(button_layout)
+        # 每个查询结果一个标签页
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        main_layout.addWidget(self.tabs)
 
         self.setLayout(main_layout)
         self.setWindowTitle("剧集名称")
@@ -844,43 +3078,479 @@ class EpisodesWindow(QWidget):
             (screen.height() - size.height()) // 2
         )
 
-    def export_to_txt(self):
-        if not self.episodes:
-            logging.warning("No episodes to export")
-            QMessageBox.warning(self, '警告', '没有可导出的剧集名称。')
+    def request_details(self, keys):
+        """ 所有标签页共用一个详情加载线程 """
+        if self.detail_loader is None:
+            self.detail_loader = EpisodeDetailLoader(self.api_key, self)
+            self.detail_loader.details_loaded.connect(self.on_details_loaded)
+            self.detail_loader.image_loaded.connect(self.on_image_loaded)
+            self.detail_loader.details_failed.connect(self.on_details_failed)
+            self.detail_loader.start()
+        self.detail_loader.request(keys)
+
+    def on_details_loaded(self, key):
+        for page in self.recent_pages:
+            page.on_details_loaded(key)
+
+    def on_image_loaded(self, still_path):
+        for page in self.recent_pages:
+            page.on_image_loaded(still_path)
+
+    def on_details_failed(self, key):
+        for page in self.recent_pages:
+            page.on_details_failed(key)
+
+    def closeEvent(self, event):
+        if self.detail_loader is not None:
+            self.detail_loader.stop()
+            retire_thread(self.detail_loader)
+            self.detail_loader = None
+        for page in self.recent_pages + self.spare_pages:
+            page.stop_filter()
+        super().closeEvent(event)
+
+def build_season_payload(episode_count, crew_size):
+    """ 生成与 TMDB 季详情结构相同的测试数据 """
+    def person(i):
+        return {
+            'id': i, 'credit_id': f'{i:024x}', 'name': f'Person {i}',
+            'original_name': f'Person {i}', 'character': f'Character {i}',
+            'job': 'Director', 'department': 'Directing', 'gender': i % 3,
+            'adult': False, 'known_for_department': 'Acting',
+            'popularity': 1.5, 'profile_path': f'/p{i}.jpg'
+        }
+
+    episodes = []
+    for number in range(1, episode_count + 1):
+        episodes.append({
+            'air_date': '2020-01-01',
+            'episode_number': number,
+            'id': 1000 + number,
+            'name': f'Episode {number}',
+            'overview': 'Lorem ipsum dolor sit amet. ' * 20,
+            'production_code': '',
+            'runtime': 45,
+            'season_number': 1,
+            'show_id': 1,
+            'still_path': f'/still{number}.jpg',
+            'vote_average': 7.5,
+            'vote_count': 100,
+            'crew': [person(i) for i in range(crew_size)],
+            'guest_stars': [person(i) for i in range(crew_size)]
+        })
+    return json.dumps({
+        '_id': 'x', 'air_date': '2020-01-01', 'name': 'Season 1',
+        'overview': '', 'id': 1, 'poster_path': '/p.jpg', 'season_number': 1,
+        'episodes': episodes
+    }).encode('utf-8')
+
+def measure_decode(decode, payload, repeat):
+    """ 返回解码函数的平均 CPU 时间（毫秒）和内存峰值（字节） """
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        decode(payload)
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / repeat
+
+    tracemalloc.start()
+    try:
+        decode(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return cpu_ms, peak
+
+def run_decode_benchmark(args):
+    """ 对比完整解码与各字段投影解码后端在大季上的 CPU/内存开销 """
+    payload = build_season_payload(args.episodes, args.crew)
+    print(f"Payload: {args.episodes} episodes, {len(payload) / 1024 / 1024:.2f} MiB")
+
+    def full_decode(data):
+        # 原实现：response.json() 后只取 name
+        return [episode['name'] for episode in json.loads(data.decode('utf-8'))['episodes']]
+
+    decoders = [('full', full_decode)]
+    for name, decoder in SEASON_DECODERS.items():
+        decoders.append((name, lambda data, decoder=decoder: decoder(io.BytesIO(data))))
+
+    print(f"{'decoder':<12}{'cpu ms':>12}{'peak MiB':>12}{'cpu %':>10}{'mem %':>10}")
+    full_cpu = full_peak = None
+    for label, decode in decoders:
+        cpu_ms, peak = measure_decode(decode, payload, args.repeat)
+        if full_cpu is None:
+            full_cpu, full_peak = cpu_ms, peak
+        print(f"{label:<12}{cpu_ms:>12.1f}{peak / 1024 / 1024:>12.2f}"
+              f"{cpu_ms / full_cpu:>10.0%}{peak / full_peak:>10.0%}")
+    return 0
+
+class StandInTMDBHandler(BaseHTTPRequestHandler):
+    """ 本地模拟的 TMDB 接口：搜索、剧集和季详情，供长时间运行测试使用 """
+
+    SHOW_PATH = re.compile(r'^/3/tv/(?P<show_id>\d+)$')
+    SEASON_PATH = re.compile(r'^/3/tv/(?P<show_id>\d+)/season/(?P<season_number>\d+)$')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/3/search/tv':
+            # 剧集 ID 由名称决定，同名查询总是得到同一部剧集
+            name = parse_qs(url.query).get('query', [''])[0]
+            show_id = int(hashlib.md5(name.encode('utf-8')).hexdigest()[:7], 16)
+            self.send_body(200, json.dumps({'results': [{'id': show_id, 'name': name}]}).encode('utf-8'))
             return
-            
-        file_name, _ = QFileDialog.getSaveFileName(
-            self, 
-            "保存剧集名称", 
-            "", 
-            "Text Files (*.txt);;All Files (*)"
-        )
-        
-        if file_name:
-            logging.info(f"Exporting episodes to: {file_name}")
+        if self.SHOW_PATH.match(url.path):
+            seasons = [
+                {'season_number': number, 'name': f'Season {number}'}
+                for number in range(1, self.server.seasons + 1)
+            ]
+            self.send_body(200, json.dumps({'seasons': seasons}).encode('utf-8'))
+            return
+        if self.SEASON_PATH.match(url.path):
+            self.send_body(200, self.server.season_payload)
+            return
+        self.send_body(404, b'{"status_message": "not found"}')
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_stand_in(connection, seasons, episodes):
+    """ 在独立进程中运行模拟服务，避免它的线程和套接字计入被测进程；端口通过管道返回 """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInTMDBHandler)
+    server.daemon_threads = True
+    server.seasons = seasons
+    server.season_payload = build_season_payload(episodes, 5)
+    connection.send(server.server_port)
+    connection.close()
+    server.serve_forever()
+
+def process_stats():
+    """ 返回 (RSS 字节数, 线程数, 打开的套接字数)，无法获取的项为 None
+
+    优先使用 psutil；没有时读取 Linux 的 /proc。线程数包括 Qt 创建的线程。
+    """
+    if psutil is not None:
+        process = psutil.Process()
+        connections = process.net_connections('all') if hasattr(process, 'net_connections') else process.connections('all')
+        return process.memory_info().rss, process.num_threads(), len(connections)
+
+    rss = threads = sockets = None
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith('Threads:'):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        sockets = 0
+        for fd in os.listdir('/proc/self/fd'):
             try:
-                with open(file_name, 'w', encoding='utf-8') as f:
-                    for episode in self.episodes:
-                        f.write(episode + '\n')
-                logging.info("Export completed successfully")
-                QMessageBox.information(
-                    self, 
-                    '导出成功', 
-                    '剧集名称已成功导出为TXT文件。'
-                )
-            except Exception as e:
-                logging.error(f"Export failed: {str(e)}")
-                logging.error(traceback.format_exc())
-                QMessageBox.critical(
-                    self, 
-                    '导出失败', 
-                    f'导出过程中发生错误：{str(e)}'
-                )
-        else:
-            logging.info("Export cancelled by user")
+                if os.readlink(f'/proc/self/fd/{fd}').startswith('socket:'):
+                    sockets += 1
+            except OSError:
+                pass
+    except OSError:
+        sockets = None
+    return rss, threads, sockets
 
-if __name__ == "__main__":
+def sample_resources(app, lookups, start):
+    """ 释放待删除的 Qt 对象并做一次完整回收后采样，避免把尚未回收的垃圾算作增长 """
+    app.processEvents()
+    QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    gc.collect()
+    rss, threads, sockets = process_stats()
+    return {
+        'lookups': lookups,
+        'elapsed': time.perf_counter() - start,
+        'rss': rss,
+        'traced': tracemalloc.get_traced_memory()[0],
+        'objects': len(gc.get_objects()),
+        'threads': threads,
+        'sockets': sockets
+    }
+
+def run_soak_lookup(app, window, show_name, timeout):
+    """ 通过界面的查询路径完成一次查询，返回结果是否已显示在结果窗口中 """
+    window.show_name_input.setText(show_name)
+    window.on_search()
+    thread = window.fetch_thread
+    loop = QEventLoop()
+    timer = QTimer(loop)
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    thread.finished.connect(loop.quit)
+    if not thread.isFinished():
+        timer.start(int(timeout * 1000))
+        loop.exec()
+    # 结果信号在 finished 之前排队，这里确保它已经处理
+    app.processEvents()
+    page = window.episodes_window.tabs.currentWidget() if window.episodes_window else None
+    return bool(page is not None and page.show_info and page.show_info['show_name'] == show_name)
+
+# 采样中的指标：(键, 显示名称, 显示时的换算比例, 单位)
+SOAK_METRICS = (
+    ('rss', 'RSS', 1024 * 1024, 'MiB'),
+    ('traced', 'traced', 1024, 'KiB'),
+    ('objects', 'objects', 1, ''),
+    ('threads', 'threads', 1, ''),
+    ('sockets', 'sockets', 1, '')
+)
+
+def run_soak(args):
+    """ 长时间运行测试：通过界面查询路径反复查询本地模拟服务，任一指标的每次查询增长超过预算时返回 1 """
+    global TMDB_API_BASE
+    # 基线在第 warmup 次查询后采样，所以预热至少一次
+    if args.warmup < 1 or args.sample_every < 1:
+        print("--warmup and --sample-every must be at least 1", file=sys.stderr)
+        return 2
+    if args.warmup >= args.lookups:
+        print("--warmup must be smaller than --lookups", file=sys.stderr)
+        return 2
+    budgets = {
+        'rss': args.rss_budget, 'traced': args.traced_budget, 'objects': args.object_budget,
+        'threads': args.thread_budget, 'sockets': args.socket_budget
+    }
+    # 每次查询的日志会主导耗时和日志文件大小，测试期间只保留警告
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    parent_connection, child_connection = multiprocessing.Pipe()
+    server = multiprocessing.Process(
+        target=serve_stand_in, args=(child_connection, args.seasons, args.episodes), daemon=True
+    )
+    server.start()
+    TMDB_API_BASE = f"http://127.0.0.1:{parent_connection.recv()}/3"
+    parent_connection.close()
+    # offscreen 平台每次显示结果窗口都会提示不支持 raise()，Qt 的消息只记入调试日志
+    qInstallMessageHandler(lambda mode, context, message: logging.debug(f"Qt: {message}"))
+
+    app = QApplication(sys.argv[:1])
+    window = ShowEpisodesApp(credentials=CredentialPool(['soak-test-key']))
+    tracemalloc.start()
+    start = time.perf_counter()
+    samples = []
+    baseline = baseline_snapshot = None
+    failures = 0
+    header = f"{'lookups':>8}{'seconds':>10}" + "".join(
+        f"{f'{label} {unit}'.strip():>14}" for _, label, _, unit in SOAK_METRICS
+    )
+    print(header)
+    try:
+        for lookup in range(1, args.lookups + 1):
+            show_number = lookup % args.shows if args.shows else lookup
+            if not run_soak_lookup(app, window, f"Soak Show {show_number}", args.timeout):
+                failures += 1
+            if lookup % args.sample_every and lookup not in (args.warmup, args.lookups):
+                continue
+            sample = sample_resources(app, lookup, start)
+            samples.append(sample)
+            print(f"{lookup:>8}{sample['elapsed']:>10.1f}" + "".join(
+                f"{'-' if sample[key] is None else f'{sample[key] / scale:.1f}' if scale > 1 else sample[key]:>14}"
+                for key, _, scale, _ in SOAK_METRICS
+            ))
+            if lookup == args.warmup:
+                baseline = sample
+                baseline_snapshot = tracemalloc.take_snapshot()
+    finally:
+        if window.episodes_window is not None:
+            window.episodes_window.close()
+        window.close()
+        wait_for_stopped_threads()
+        server.terminate()
+        server.join()
+
+    final = samples[-1]
+    lookups = final['lookups'] - baseline['lookups']
+    growth = {}
+    over_budget = []
+    print(f"\nGrowth per lookup over {lookups} lookups after {args.warmup} warm-up lookups:")
+    for key, label, _, _ in SOAK_METRICS:
+        if final[key] is None or baseline[key] is None:
+            print(f"  {label:<10}unavailable")
+            continue
+        growth[key] = (final[key] - baseline[key]) / lookups
+        ok = growth[key] <= budgets[key]
+        if not ok:
+            over_budget.append(label)
+        print(f"  {label:<10}{growth[key]:>12.3f}  (budget {budgets[key]:g}){'' if ok else '  OVER BUDGET'}")
+
+    if over_budget or args.top:
+        print("\nLargest traced allocation growth since warm-up:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')[:args.top or 10]:
+            print(f"  {stat}")
+    tracemalloc.stop()
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'samples': samples, 'growth_per_lookup': growth, 'budgets': budgets,
+                       'failed_lookups': failures}, f, indent=2)
+    if failures:
+        print(f"{failures} lookups did not show a result", file=sys.stderr)
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}", file=sys.stderr)
+    return 1 if over_budget or failures else 0
+
+def read_show_list(path):
+    """ 读取剧集列表文件，每行一个剧集名称 """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def write_results(queue, output):
+    """ 将已完成任务的结果按 JSON Lines 写出 """
+    with open(output, 'w', encoding='utf-8') as f:
+        for show_name, language, result in queue.results():
+            record = {'query': show_name, 'language': language, 'result': result}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def build_credential_pool(args):
+    """ --api-key 指定的凭据优先，否则使用 api_key.txt 中的全部凭据；没有凭据时返回 None """
+    credentials = args.api_key or read_credentials()
+    if not credentials:
+        print("No API key: pass --api-key or create api_key.txt", file=sys.stderr)
+        return None
+    logging.info(f"Using {len(credentials)} credentials at {args.key_rate} requests/s each")
+    return CredentialPool(credentials, args.key_rate)
+
+def run_batch(args):
+    """ 批量查询：任务保存在 SQLite 中，中断后重新运行即可继续 """
+    credentials = build_credential_pool(args)
+    if credentials is None:
+        return 2
+
+    queue = JobQueue(args.db, max_attempts=args.max_attempts, retry_delay=args.retry_delay)
+    try:
+        if args.input:
+            added = queue.add_jobs(read_show_list(args.input), args.language)
+            logging.info(f"Queued {added} new jobs from {args.input}")
+        recovered = queue.recover()
+        if recovered:
+            logging.info(f"Recovered {recovered} interrupted jobs")
+        if args.retry_failed:
+            logging.info(f"Requeued {queue.retry_failed()} failed jobs")
+
+        rate_limiter = RateLimiter(args.rate)
+        try:
+            if args.processes > 0:
+                run_sharded_jobs(queue, credentials, rate_limiter, args.processes)
+            else:
+                fetcher = EpisodeFetcher(credentials, create_session(pool_size=args.workers), rate_limiter)
+                try:
+                    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                        workers = [executor.submit(process_jobs, queue, fetcher) for _ in range(args.workers)]
+                        for worker in workers:
+                            worker.result()
+                finally:
+                    fetcher.close()
+        except CredentialsExhausted as e:
+            # 进程池退出时已终止所有工作进程；未完成的任务留在队列中，更换凭据后重新运行即可继续
+            released = queue.release()
+            logging.error(f"Batch stopped: {str(e)}")
+            print(f"Batch stopped: {e}. {released} interrupted jobs were requeued; "
+                  f"update the credentials and rerun to continue.", file=sys.stderr)
+            return 2
+
+        if args.output:
+            write_results(queue, args.output)
+        counts = queue.counts()
+        print(", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+        return 1 if counts.get(JobQueue.FAILED) else 0
+    finally:
+        queue.close()
+
+def run_diff(args):
+    """ 输出两次运行之间变化的剧集（JSON Lines），统计信息写到标准错误 """
+    start = time.perf_counter()
+    counts = {'added': 0, 'removed': 0, 'renamed': 0}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        with CatalogSnapshot(args.old) as old, CatalogSnapshot(args.new) as new:
+            for change in diff_catalogs(old, new):
+                counts[change['change']] += 1
+                output.write(json.dumps(change, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    summary = ", ".join(f"{change}: {n}" for change, n in counts.items())
+    print(f"{summary} ({time.perf_counter() - start:.2f} s)", file=sys.stderr)
+    return 0
+
+def run_server(args):
+    """ 本地 HTTP 服务模式，多个工具共用同一份缓存和速率限制 """
+    credentials = build_credential_pool(args)
+    if credentials is None:
+        return 2
+
+    fetcher = EpisodeFetcher(credentials, create_session(pool_size=args.pool_size), RateLimiter(args.rate))
+    cache = LRUCache(args.cache_size, ttl=args.cache_ttl or None)
+    server = ThreadingHTTPServer((args.host, args.port), EpisodeRequestHandler)
+    server.daemon_threads = True
+    server.service = EpisodeService(fetcher, cache)
+    logging.info(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Server stopped")
+    finally:
+        server.server_close()
+        fetcher.close()
+    return 0
+
+def run_snapshot(args):
+    """ 从任务队列生成目录快照，或在快照中查询一部剧集 """
+    if args.db:
+        queue = JobQueue(args.db)
+        try:
+            written = write_catalog_snapshot(args.snapshot, queue.results())
+        finally:
+            queue.close()
+        print(f"Wrote {written} shows to {args.snapshot} ({os.path.getsize(args.snapshot) / 1024 / 1024:.2f} MiB)")
+
+    start = time.perf_counter()
+    with CatalogSnapshot(args.snapshot) as snapshot:
+        opened = time.perf_counter()
+        print(f"Opened in {(opened - start) * 1000:.2f} ms: "
+              + ", ".join(f"{n} {name}" for name, n in snapshot.counts.items()))
+        if args.show:
+            index = snapshot.find(args.show, args.language)
+            if index is None:
+                print(f"Show not found: {args.show}", file=sys.stderr)
+                return 1
+            seasons = snapshot.seasons(index)
+            print(f"Looked up in {(time.perf_counter() - opened) * 1000:.2f} ms")
+            for season in seasons:
+                print(format_season(season))
+    return 0
+
+def run_async_event_loop(app, main_window):
+    """ 由 qasync 的事件循环同时驱动 Qt 和 asyncio，直到程序退出 """
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    quit_event = asyncio.Event()
+    app.aboutToQuit.connect(quit_event.set)
+    with loop:
+        loop.run_until_complete(quit_event.wait())
+        # 退出时取消尚未完成的查询，再关闭会话
+        tasks = list(main_window.search_tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        try:
+            if main_window.async_fetcher is not None:
+                loop.run_until_complete(main_window.async_fetcher.close())
+        except Exception as e:
+            logging.warning(f"Error closing async session: {str(e)}")
+    return 0
+
+def run_gui(async_mode=False):
+    """ 启动图形界面，返回退出码 """
     try:
         # 设置高 DPI 支持
         os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "1"
@@ -889,6 +3559,9 @@ if __name__ == "__main__":
 
         setup_logging()
         logging.info("Application starting")
+        if async_mode and not async_ui_available():
+            logging.warning("Async mode needs qasync and aiohttp, falling back to threads")
+            async_mode = False
         
         # 创建应用实例
         app = QApplication(sys.argv)
@@ -919,7 +3592,7 @@ if __name__ == "__main__":
         # 创建并显示主窗口
         try:
             logging.info("Creating main window")
-            main_window = ShowEpisodesApp()
+            main_window = ShowEpisodesApp(async_mode)
             main_window.setWindowState(Qt.WindowState.WindowActive)  # 设置窗口为活动状态
             main_window.show()
             logging.info("Main window show() called")
@@ -935,9 +3608,13 @@ if __name__ == "__main__":
             
             # 进入事件循环
             logging.info("Entering event loop")
-            return_code = app.exec()
+            if async_mode:
+                return_code = run_async_event_loop(app, main_window)
+            else:
+                return_code = app.exec()
+            wait_for_stopped_threads()
             logging.info(f"Application exited with code: {return_code}")
-            sys.exit(return_code)
+            return return_code
             
         except Exception as e:
             logging.critical(f"Error creating/showing main window: {str(e)}")
@@ -948,7 +3625,7 @@ if __name__ == "__main__":
                 f'窗口创建失败：{str(e)}',
                 QMessageBox.StandardButton.Ok
             )
-            sys.exit(1)
+            return 1
             
     except Exception as e:
         logging.critical(f"Critical error during startup: {str(e)}")
@@ -962,4 +3639,98 @@ if __name__ == "__main__":
             )
         except:
             print(f"Fatal error: {str(e)}")
-        sys.exit(1)
+        return 1
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='TMDB剧集查询工具（不带参数运行时启动图形界面）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    gui_parser = subparsers.add_parser('gui', help='启动图形界面')
+    gui_parser.add_argument('--async', dest='async_mode', action='store_true',
+                            help='使用 asyncio 事件循环执行查询（需要 qasync 和 aiohttp）')
+    gui_parser.set_defaults(func=lambda args: run_gui(args.async_mode))
+
+    bench_parser = subparsers.add_parser('bench-decode', help='对比完整解码与字段投影解码的 CPU/内存开销')
+    bench_parser.add_argument('--episodes', type=int, default=500, help='每季集数')
+    bench_parser.add_argument('--crew', type=int, default=40, help='每集的演职员与客串人数')
+    bench_parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    bench_parser.set_defaults(func=run_decode_benchmark)
+
+    batch_parser = subparsers.add_parser('batch', help='批量查询剧集，支持中断后继续')
+    batch_parser.add_argument('--db', default='jobs.sqlite', help='任务队列数据库路径')
+    batch_parser.add_argument('--input', help='剧集列表文件，每行一个名称；不指定时只处理队列中剩余的任务')
+    batch_parser.add_argument('--language', default='zh-CN', help='查询语言，例如 zh-CN、en-US')
+    batch_parser.add_argument('--workers', type=int, default=4, help='并发工作线程数')
+    batch_parser.add_argument('--processes', type=int, default=0,
+                              help='使用多进程分片处理的进程数，0 表示只用单进程多线程')
+    batch_parser.add_argument('--key-rate', type=float, default=40,
+                              help='每个凭据的每秒请求数上限，0 表示不限速')
+    batch_parser.add_argument('--rate', type=float, default=0,
+                              help='所有凭据、线程和进程合计的每秒请求数上限，0 表示只按单个凭据限速')
+    batch_parser.add_argument('--max-attempts', type=int, default=3, help='每个任务的最大尝试次数')
+    batch_parser.add_argument('--retry-delay', type=float, default=5,
+                              help='第一次重试前等待的秒数，之后每次翻倍（最长 300 秒）')
+    batch_parser.add_argument('--retry-failed', action='store_true',
+                              help='将已用完尝试次数的失败任务重新排队')
+    batch_parser.add_argument('--output', help='将全部已完成结果导出为 JSON Lines 文件')
+    batch_parser.add_argument('--api-key', action='append',
+                              help='TMDB API 密钥或 Bearer 令牌，可重复指定；默认读取 api_key.txt 中的全部凭据')
+    batch_parser.set_defaults(func=run_batch)
+
+    serve_parser = subparsers.add_parser('serve', help='以本地 HTTP 服务方式提供剧集查询')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    serve_parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    serve_parser.add_argument('--cache-size', type=int, default=1024, help='缓存的剧集结果数量')
+    serve_parser.add_argument('--cache-ttl', type=float, default=3600, help='缓存有效期（秒），0 表示不过期')
+    serve_parser.add_argument('--key-rate', type=float, default=40, help='每个凭据每秒请求 TMDB 的次数上限，0 表示不限速')
+    serve_parser.add_argument('--rate', type=float, default=0, help='所有凭据合计的每秒请求次数上限，0 表示只按单个凭据限速')
+    serve_parser.add_argument('--pool-size', type=int, default=32, help='连接池大小')
+    serve_parser.add_argument('--api-key', action='append',
+                              help='TMDB API 密钥或 Bearer 令牌，可重复指定；默认读取 api_key.txt 中的全部凭据')
+    serve_parser.set_defaults(func=run_server)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='生成或查询列式目录快照')
+    snapshot_parser.add_argument('snapshot', help='快照文件路径')
+    snapshot_parser.add_argument('--db', help='从该任务队列的已完成结果生成快照')
+    snapshot_parser.add_argument('--show', help='在快照中查询的剧集名称')
+    snapshot_parser.add_argument('--language', help='查询的语言，不指定时匹配任意语言')
+    snapshot_parser.set_defaults(func=run_snapshot)
+
+    diff_parser = subparsers.add_parser('diff', help='比较两次运行的目录快照，只输出变化的剧集')
+    diff_parser.add_argument('old', help='上一次运行的快照')
+    diff_parser.add_argument('new', help='本次运行的快照')
+    diff_parser.add_argument('--output', help='变化记录的输出文件（JSON Lines），默认输出到标准输出')
+    diff_parser.set_defaults(func=run_diff)
+
+    soak_parser = subparsers.add_parser('soak', help='长时间运行测试：通过界面查询路径反复查询本地模拟服务并检查资源增长')
+    soak_parser.add_argument('--lookups', type=int, default=2000, help='查询次数')
+    soak_parser.add_argument('--warmup', type=int, default=200, help='预热查询次数，之后的采样作为增长基线')
+    soak_parser.add_argument('--sample-every', type=int, default=100, help='每隔多少次查询采样一次')
+    soak_parser.add_argument('--shows', type=int, default=0, help='循环查询的不同剧集数，0 表示每次都查询新剧集')
+    soak_parser.add_argument('--seasons', type=int, default=3, help='模拟服务中每部剧集的季数')
+    soak_parser.add_argument('--episodes', type=int, default=20, help='模拟服务中每季的集数')
+    soak_parser.add_argument('--timeout', type=float, default=30, help='单次查询的超时时间（秒）')
+    soak_parser.add_argument('--rss-budget', type=float, default=8192, help='每次查询允许的 RSS 增长（字节）')
+    soak_parser.add_argument('--traced-budget', type=float, default=1024,
+                             help='每次查询允许的 Python 内存增长（tracemalloc，字节）')
+    soak_parser.add_argument('--object-budget', type=float, default=2, help='每次查询允许增加的 Python 对象数')
+    soak_parser.add_argument('--thread-budget', type=float, default=0.01, help='每次查询允许增加的线程数')
+    soak_parser.add_argument('--socket-budget', type=float, default=0.01, help='每次查询允许增加的套接字数')
+    soak_parser.add_argument('--top', type=int, default=0,
+                             help='输出内存增长最多的代码行数；超出预算时默认输出 10 行')
+    soak_parser.add_argument('--report', help='将全部采样和增长结果写入 JSON 文件')
+    soak_parser.set_defaults(func=run_soak)
+
+    return parser
+
+def run_cli(argv):
+    """ 命令行模式入口，返回退出码 """
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        setup_logging()
+        sys.exit(run_cli(sys.argv[1:]))
+    sys.exit(run_gui())